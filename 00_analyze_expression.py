@@ -25,7 +25,7 @@ Outputs:
     across all samples, saved to: results/tables/<COHORT>_<GENE>_expression.tsv
 
 Requirements:
-    - pandas
+    - pandas, numpy (via tcga_data)
     - Python ≥ 3.8
 
 Author:
@@ -39,7 +39,7 @@ Author:
 
 import sys
 import os
-import pandas as pd
+from tcga_data import resolve_path, expression_path, load_expression, gene_vector
 
 def main():
     # ✅ Check argument count
@@ -54,24 +54,21 @@ def main():
     # ✅ Resolve absolute script and project paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.abspath(os.path.join(script_dir, "..", ".."))
-    data_path = os.path.join(project_dir, "data", "processed", f"TCGA.{cohort}.sampleMap_HiSeqV2")
     results_path = os.path.join(project_dir, "results", "tables")
     os.makedirs(results_path, exist_ok=True)
 
-    # 🔁 Fallback to .tsv extension if needed
-    if not os.path.exists(data_path) and os.path.exists(data_path + ".tsv"):
-        data_path += ".tsv"
-
-    # ❌ Fail if expression file still not found
-    if not os.path.exists(data_path):
-        print(f"❌ Expression file not found:\n{data_path}")
+    # ❌ Fail if expression file not found (bare name, then .tsv/.txt fallbacks)
+    try:
+        resolve_path(expression_path(cohort), "Expression")
+    except FileNotFoundError as e:
+        print(e)
         sys.exit(1)
 
     print("✅ Expression file located.")
 
-    # ✅ Load expression matrix
+    # ✅ Load only the requested gene row (float32, streamed in chunks)
     try:
-        df = pd.read_csv(data_path, sep="\t", index_col=0)
+        df = load_expression(cohort, genes=[gene])
         print("✅ Expression matrix loaded.")
     except Exception as e:
         print(f"❌ Failed to load expression matrix:\n{e}")
@@ -83,7 +80,7 @@ def main():
         sys.exit(1)
 
     # ✅ Extract gene expression vector
-    expression_vector = df.loc[gene]
+    expression_vector = gene_vector(df, gene)
     output_file = os.path.join(results_path, f"{cohort}_{gene}_expression.tsv")
     try:
         expression_vector.to_csv(output_file, sep="\t", header=False)
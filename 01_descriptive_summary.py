@@ -39,7 +39,9 @@ Author:
 
 import sys
 import os
-import pandas as pd
+from tcga_data import load_expression
+from tcga_stats import describe_rows
+from tcga_results import ResultsStore
 
 def main():
     if len(sys.argv) != 2:
@@ -52,33 +54,23 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.abspath(os.path.join(script_dir, "..", ".."))
 
-    data_path = os.path.join(project_dir, "data", "processed", f"TCGA.{cohort}.sampleMap_HiSeqV2")
     results_path = os.path.join(project_dir, "results", "tables")
     os.makedirs(results_path, exist_ok=True)
 
-    # File extension fallback
-    if not os.path.exists(data_path) and os.path.exists(data_path + ".tsv"):
-        data_path += ".tsv"
-
-    if not os.path.exists(data_path):
-        raise FileNotFoundError(f"❌ Expression file not found:\n{data_path}")
-
-    # Load and transpose expression matrix (genes in columns, samples in rows)
-    df = pd.read_csv(data_path, sep="\t", index_col=0).T
+    # Load expression matrix in its native gene-major layout (genes in rows,
+    # samples in columns, float32) so no transposed copy is needed
+    df = load_expression(cohort)
 
     # Compute descriptive statistics per gene
-    summary_df = pd.DataFrame({
-        "mean": df.mean(skipna=True),
-        "std": df.std(skipna=True),
-        "min": df.min(skipna=True),
-        "max": df.max(skipna=True),
-        "n_nonmissing": df.count()
-    })
+    summary_df = describe_rows(df)
 
     # Save summary statistics
     output_file = os.path.join(results_path, f"{cohort}_expression_summary.tsv")
     summary_df.to_csv(output_file, sep="\t")
 
+    # Append per-gene statistics to the results database
+    ResultsStore().append_frame(cohort, "descriptive_summary", summary_df)
+
     print(f"✅ Descriptive summary for {cohort} saved to:\n{output_file}")
 
 if __name__ == "__main__":
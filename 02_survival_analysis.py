@@ -6,9 +6,15 @@ Description:
     based on gene expression. Survival metrics such as overall survival time and status 
     are merged with expression data, and groups are split for comparative analysis.
 
+    Samples may instead be stratified by an immune/cell-type signature score from
+    09_signature_scoring.py (--signature). With --covariate, a Cox model of the target
+    adjusted for a signature score is fitted in addition to the log-rank test.
+
 Usage:
     python3 02_survival_analysis.py [OPTIONS]
     python3 02_survival_analysis.py --gene PRRG2 --cohort LUAD
+    python3 02_survival_analysis.py --signature Cytolytic_activity --cohort LUAD
+    python3 02_survival_analysis.py --gene PRRG2 --covariate T_cells --cohort LUAD
 
 This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
 
@@ -26,36 +32,50 @@ Author:
 
 
 import argparse
-import pandas as pd
-from lifelines import KaplanMeierFitter
+from lifelines import CoxPHFitter, KaplanMeierFitter
 from lifelines.statistics import logrank_test
 import matplotlib.pyplot as plt
 import os
+from tcga_data import load_expression, load_survival, gene_vector
+from tcga_results import ResultsStore
+from tcga_signatures import DEFAULT_GMT, METHODS, signature_scores
 
 def main():
     parser = argparse.ArgumentParser(description="Kaplan-Meier survival analysis for TCGA gene expression.")
     parser.add_argument('--cohort', required=True, help="TCGA cohort name (e.g., KIRC)")
-    parser.add_argument('--gene', required=True, help="Gene of interest (e.g., PRRG2)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--gene', help="Gene of interest (e.g., PRRG2)")
+    target.add_argument('--signature', help="Signature score to stratify by (see 09_signature_scoring.py)")
+    parser.add_argument('--covariate', help="Signature score to adjust for in a Cox model")
+    parser.add_argument('--method', choices=METHODS, default="zscore", help="Signature scoring method (default: zscore)")
+    parser.add_argument('--gmt', default=DEFAULT_GMT, help="Signature GMT file (default: %(default)s)")
     args = parser.parse_args()
+    args.cohort = args.cohort.upper()
+    target = args.gene or args.signature
 
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-    data_dir = os.path.join(base_dir, "data")
-    processed_dir = os.path.join(data_dir, "processed")
-    metadata_dir = os.path.join(data_dir, "metadata")
     results_dir = os.path.join(base_dir, "results", "figures")
     os.makedirs(results_dir, exist_ok=True)
 
-    expression_file = os.path.join(processed_dir, f"TCGA.{args.cohort}.sampleMap_HiSeqV2")
-    survival_file = os.path.join(metadata_dir, "survival_tcga_cdr.tsv")
-
-    if not os.path.exists(expression_file):
-        raise FileNotFoundError(f"Expression file not found: {expression_file}")
-    if not os.path.exists(survival_file):
-        raise FileNotFoundError(f"Survival file not found: {survival_file}")
-
-    # Load data
-    exp = pd.read_csv(expression_file, sep="\t", index_col=0).T
-    surv = pd.read_csv(survival_file, sep="\t")
+    # Signature scores (cached by 09_signature_scoring.py, computed here if missing)
+    scores = None
+    if args.signature or args.covariate:
+        scores = signature_scores(args.cohort, args.method, args.gmt)
+        for name in filter(None, [args.signature, args.covariate]):
+            if name not in scores.columns:
+                raise ValueError(f"❌ Signature '{name}' not found in {args.gmt}.")
+
+    # Load data (only the gene of interest is kept from the expression matrix)
+    if args.gene:
+        exp = load_expression(args.cohort, genes=[args.gene])
+        if args.gene not in exp.index:
+            raise ValueError(f"❌ {args.gene} not found in expression matrix.")
+        exp = gene_vector(exp, args.gene).to_frame()
+    else:
+        exp = scores[[args.signature]]
+    if args.covariate:
+        exp = exp.join(scores[args.covariate].rename("covariate"))
+    surv = load_survival()
 
     # Format survival data
     surv = surv.rename(columns={"sample": "Sample", "OS": "OS_event", "OS.time": "OS_time"})
@@ -64,11 +84,11 @@ def main():
 
     # Match and merge
     exp.index = exp.index.str.replace(r"-01A.*$", "", regex=True)
-    merged = exp[[args.gene]].join(surv.set_index("Sample"))
+    merged = exp.join(surv.set_index("Sample"))
     merged.dropna(inplace=True)
 
     # Create expression group
-    merged["group"] = merged[args.gene] > merged[args.gene].median()
+    merged["group"] = merged[target] > merged[target].median()
 
     # Kaplan-Meier plot
     kmf = KaplanMeierFitter()
@@ -76,7 +96,7 @@ def main():
         kmf.fit(
             durations=merged[merged.group == group]["OS_time"],
             event_observed=merged[merged.group == group]["OS_event"],
-            label=f"{label} {args.gene}"
+            label=f"{label} {target}"
         )
         kmf.plot_survival_function()
 
@@ -91,11 +111,29 @@ def main():
     p_value = results.p_value
     print(f"🧪 Log-rank test p-value: {p_value:.4g}")
 
+    # Append test results to the results database
+    store = ResultsStore()
+    store.append(args.cohort, "survival", target, {
+        "logrank_p": p_value,
+        "logrank_statistic": results.test_statistic,
+        "n_high": int(merged.group.sum()),
+        "n_low": int((~merged.group).sum()),
+    })
+
+    # Cox model of the (continuous) target adjusted for the covariate signature
+    if args.covariate:
+        cph = CoxPHFitter()
+        cph.fit(merged[[target, "covariate", "OS_time", "OS_event"]], duration_col="OS_time", event_col="OS_event")
+        hr, cox_p = cph.summary.loc[target, "exp(coef)"], cph.summary.loc[target, "p"]
+        print(f"🧪 Cox HR for {target} adjusted for {args.covariate}: {hr:.3g} (p = {cox_p:.4g})")
+        store.append(args.cohort, "survival", target, {"cox_hr_adjusted": hr, "cox_p_adjusted": cox_p},
+                     feature=args.covariate)
+
     # Save plot
-    plt.title(f"Survival Curve: {args.gene} in {args.cohort}")
+    plt.title(f"Survival Curve: {target} in {args.cohort}")
     plt.xlabel("Days")
     plt.ylabel("Survival Probability")
-    output_path = os.path.join(results_dir, f"{args.cohort}_{args.gene}_survival.png")
+    output_path = os.path.join(results_dir, f"{args.cohort}_{target}_survival.png")
     plt.savefig(output_path)
     plt.close()
 
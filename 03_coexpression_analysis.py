@@ -8,13 +8,19 @@ Description:
     reporting both Pearson correlation coefficients and p-values. Useful for identifying immune 
     signaling relationships or microenvironmental associations.
 
+    The target may also be an immune/cell-type signature score from 09_signature_scoring.py
+    (--signature), and a signature score may be given as a covariate (--covariate) to report
+    partial correlations adjusted for it.
+
 Usage:
-    python3 03_coexpression_analysis.py --gene PRRG2 --cohort LUAD
+    python3 03_coexpression_analysis.py --gene PRRG2 --cohort LUAD [--workers 8]
+    python3 03_coexpression_analysis.py --signature IFNG_signature --cohort LUAD
+    python3 03_coexpression_analysis.py --gene PRRG2 --covariate T_cells --cohort LUAD
 
 This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
 
 Requirements:
-    - pandas, scipy.stats
+    - pandas, numpy, scipy
     - Python ≥ 3.8
 
 Author:
@@ -25,50 +31,66 @@ Author:
 """
 
 import argparse
-import pandas as pd
 import os
-from scipy.stats import pearsonr
+from tcga_data import load_expression
+from tcga_stats import coexpression
+from tcga_results import ResultsStore
+from tcga_signatures import DEFAULT_GMT, METHODS, signature_scores
 
 def main():
     parser = argparse.ArgumentParser(description="Co-expression analysis using Pearson correlation.")
     parser.add_argument('--cohort', required=True, help="TCGA cohort (e.g., KIRC)")
-    parser.add_argument('--gene', required=True, help="Gene symbol (e.g., PRRG2)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--gene', help="Gene symbol (e.g., PRRG2)")
+    target.add_argument('--signature', help="Signature score to use as the target (see 09_signature_scoring.py)")
+    parser.add_argument('--covariate', help="Signature score to adjust for (partial correlation)")
+    parser.add_argument('--method', choices=METHODS, default="zscore", help="Signature scoring method (default: zscore)")
+    parser.add_argument('--gmt', default=DEFAULT_GMT, help="Signature GMT file (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for the correlation (default: 1)")
     args = parser.parse_args()
+    args.cohort = args.cohort.upper()
 
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-    data_file = os.path.join(base_dir, "data", "processed", f"TCGA.{args.cohort}.sampleMap_HiSeqV2")
     results_dir = os.path.join(base_dir, "results", "tables")
     os.makedirs(results_dir, exist_ok=True)
 
-    if not os.path.exists(data_file):
-        raise FileNotFoundError(f"❌ Expression file not found: {data_file}")
-
-    # Load and clean data
-    df = pd.read_csv(data_file, sep="\t", index_col=0)
-    df = df.dropna(axis=1, how='any')  # Drop samples with missing expression
+    # Load data (genes x samples, float32)
+    df = load_expression(args.cohort)
 
-    if args.gene not in df.index:
+    if args.gene and args.gene not in df.index:
         raise ValueError(f"❌ {args.gene} not found in expression matrix.")
 
-    target_vector = df.loc[args.gene]
+    # Signature scores (cached by 09_signature_scoring.py, computed here if missing).
+    # Scores are cohort-wide, so they are computed before any samples are dropped
+    scores = None
+    if args.signature or args.covariate:
+        scores = signature_scores(args.cohort, args.method, args.gmt, args.workers, matrix=df)
+        for name in filter(None, [args.signature, args.covariate]):
+            if name not in scores.columns:
+                raise ValueError(f"❌ Signature '{name}' not found in {args.gmt}.")
+
+    df = df.dropna(axis=1, how='any')  # Drop samples with missing expression
 
-    # Compute Pearson correlation and p-values
-    def compute_stats(row):
-        r, p = pearsonr(row, target_vector)
-        return pd.Series({'correlation': r, 'p_value': p})
+    target = scores[args.signature] if args.signature else args.gene
+    covariate = scores[args.covariate] if args.covariate else None
+    label = (args.gene or args.signature) + (f"_adj_{args.covariate}" if args.covariate else "")
 
-    results = df.apply(compute_stats, axis=1)
-    results = results.drop(index=args.gene)  # Exclude self-correlation
+    # Compute Pearson correlation and p-values for all genes at once (gene
+    # blocks are spread over worker processes sharing one copy of the matrix)
+    results = coexpression(df, target, workers=args.workers, covariate=covariate)
+    if args.gene:
+        results = results.drop(index=args.gene)  # Exclude self-correlation
 
     # Sort by correlation
     results_sorted = results.sort_values(by="correlation", ascending=False)
 
     # Save results
-    output_top50 = os.path.join(results_dir, f"{args.cohort}_{args.gene}_top50_coexpression.csv")
-    output_full = os.path.join(results_dir, f"{args.cohort}_{args.gene}_coexpression_full.csv")
+    output_top50 = os.path.join(results_dir, f"{args.cohort}_{label}_top50_coexpression.csv")
+    output_full = os.path.join(results_dir, f"{args.cohort}_{label}_coexpression_full.csv")
 
     results_sorted.head(50).to_csv(output_top50)
     results_sorted.to_csv(output_full)
+    ResultsStore().append_frame(args.cohort, "coexpression", results_sorted, gene=label)
 
     print(f"✅ Top 50 co-expressed genes (with p-values) saved to: {output_top50}")
     print(f"📄 Full correlation results saved to: {output_full}")
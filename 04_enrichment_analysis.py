@@ -6,9 +6,14 @@ Description:
     list using gseapy or similar enrichment libraries. Designed for downstream 
     interpretation of differentially expressed or co-expressed gene sets.
 
+    --gene-sets selects the Enrichr library (default: KEGG_2021_Human). Enrichr
+    libraries are queried live and may change between releases; pass a local
+    GMT file instead for an offline, reproducible run.
+
 Usage:
     python3 04_enrichment_analysis.py [OPTIONS]
     Example: python3 04_enrichment_analysis.py gene_list.txt
+    Example: python3 04_enrichment_analysis.py --gene PRRG2 --cohort LUAD --gene-sets KEGG_2021_Human.gmt
 
 This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
 
@@ -29,19 +34,23 @@ import argparse
 import pandas as pd
 import os
 from gseapy import enrichr
+from tcga_results import ResultsStore, enrichment_stats, enrichment_table_name
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--cohort', required=True)
     parser.add_argument('--gene', required=True)
+    parser.add_argument('--gene-sets', default='KEGG_2021_Human',
+                        help="Enrichr library name or local GMT file (default: %(default)s)")
     args = parser.parse_args()
+    args.cohort = args.cohort.upper()
 
     # Get base directory (2 levels up from script location)
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 
     # Construct paths relative to project layout
     coexp_path = os.path.join(base_dir, "results", "tables", f"{args.cohort}_{args.gene}_top50_coexpression.csv")
-    out_path = os.path.join(base_dir, "results", "tables", f"{args.cohort}_{args.gene}_kegg_enrichment.csv")
+    out_path = os.path.join(base_dir, "results", "tables", enrichment_table_name(args.cohort, args.gene, args.gene_sets))
 
     if not os.path.exists(coexp_path):
         raise FileNotFoundError(f"❌ File not found: {coexp_path}")
@@ -49,11 +58,12 @@ def main():
     ranked_genes = pd.read_csv(coexp_path, index_col=0).head(100).index.tolist()
 
     enr = enrichr(gene_list=ranked_genes,
-                  gene_sets='KEGG_2021_Human',
+                  gene_sets=args.gene_sets,
                   organism='Human')
 
     res = enr.results
     res.to_csv(out_path, index=False)
+    ResultsStore().append_frame(args.cohort, "enrichment", enrichment_stats(res), gene=args.gene)
     print(f"✅ Enrichment results saved to:\n{out_path}")
 
 if __name__ == "__main__":
@@ -28,6 +28,7 @@ Author:
 import sys
 import pandas as pd
 import os
+from tcga_data import load_expression, load_cnv, load_methylation, load_probe_map, gene_vector
 
 # Parse cohort argument
 if len(sys.argv) < 2:
@@ -40,34 +41,23 @@ gene_of_interest = "PRRG2"
 # Resolve base directory from script location
 script_dir = os.path.dirname(os.path.abspath(__file__))
 base_dir = os.path.abspath(os.path.join(script_dir, "..", ".."))
-
-# Construct file paths
-data_dir = os.path.join(base_dir, "data", "processed")
-meta_dir = os.path.join(base_dir, "data", "metadata")
 results_dir = os.path.join(base_dir, "results", "tables")
+os.makedirs(results_dir, exist_ok=True)
 
-expr_file = os.path.join(data_dir, f"TCGA.{cohort}.sampleMap_HiSeqV2")
-cnv_file = os.path.join(data_dir, f"TCGA.{cohort}.sampleMap_Gistic2_CopyNumber_Gistic2_all_thresholded.by_genes")
-meth_file = os.path.join(data_dir, f"TCGA.{cohort}.sampleMap_HumanMethylation450")
-probe_map_file = os.path.join(data_dir, "probeMap_hugo_gencode_good_hg19_V24lift37_probemap")
-
-# Load expression data
-expr = pd.read_csv(expr_file, sep='\t', index_col=0).T
-expr = expr[[gene_of_interest]].rename(columns={gene_of_interest: "expression"})
+# Load expression data (gene row only, float32)
+expr = gene_vector(load_expression(cohort, genes=[gene_of_interest]), gene_of_interest, "expression").to_frame()
 
-# Load CNV data
-cnv = pd.read_csv(cnv_file, sep='\t', index_col=0).T
-cnv = cnv[[gene_of_interest]].rename(columns={gene_of_interest: "cnv"})
+# Load CNV data (gene row only, int8 GISTIC calls)
+cnv = gene_vector(load_cnv(cohort, genes=[gene_of_interest]), gene_of_interest, "cnv").to_frame()
 
-# Load methylation and probe map
-meth = pd.read_csv(meth_file, sep='\t', index_col=0).T
-probe_map = pd.read_csv(probe_map_file, sep='\t', header=None, names=["probe", "gene"])
+# Load probe map and keep the methylation probes annotated to PRRG2
+probe_map = load_probe_map()
+prrg2_probes = probe_map.loc[probe_map["gene"] == gene_of_interest, "probe"].tolist()
 
-# Extract PRRG2 probes and average
-prrg2_probes = probe_map[probe_map["gene"] == gene_of_interest]["probe"].values
-meth_filtered = meth[prrg2_probes]
-meth["methylation"] = meth_filtered.mean(axis=1)
-meth = meth[["methylation"]]
+# Load only those probes (float32 betas, streamed) and average per sample
+meth = load_methylation(cohort, probes=prrg2_probes)
+meth = meth.mean(axis=0).to_frame("methylation")
+meth.index = pd.Index(meth.index.astype(str), name="sample")
 
 # Merge all data
 merged = expr.join(cnv, how="inner").join(meth, how="inner")
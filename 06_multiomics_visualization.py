@@ -8,6 +8,7 @@ import seaborn as sns
 import os
 import argparse
 from scipy.stats import pearsonr
+from tcga_results import ResultsStore, multiomics_stats
 
 # Argument parsing
 parser = argparse.ArgumentParser(description="Generate multi-omics visualizations for PRRG2")
@@ -86,5 +87,6 @@ corr_df = pd.DataFrame({
     'p_value': [p_expr_cnv, p_expr_meth]
 })
 corr_df.to_csv(os.path.join(output_dir, f"{args.cohort}_PRRG2_correlation_stats.csv"), index=False)
+ResultsStore().append(args.cohort, "multiomics", "PRRG2", multiomics_stats(corr_df.set_index("Comparison")))
 
 print(f"✅ Figures and correlation results for {args.cohort} saved to: {output_dir}")
@@ -27,11 +27,13 @@ Author:
 
 import os
 import argparse
+import glob
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import plotly.express as px  # type: ignore
 from lifelines import KaplanMeierFitter
+from tcga_data import resolve_path, expression_path, load_expression, load_clinical, load_survival, gene_vector, seed_random
 
 # -------------------------
 # Parse command-line input
@@ -45,44 +47,31 @@ cohort = args.cohort.upper()
 # Set project directories
 # -------------------------
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-data_dir = os.path.join(root, "data", "processed")
-metadata_dir = os.path.join(root, "data", "metadata")
 figures_dir = os.path.join(root, "results", "figures")
 tables_dir = os.path.join(root, "results", "tables")
 os.makedirs(figures_dir, exist_ok=True)
 
+# Fixed seed so the stripplot jitter is identical on every run ($TCGA_SEED)
+seed_random()
+
 # -------------------------
 # Load expression matrix
 # -------------------------
-base_expr_file = os.path.join(data_dir, f"TCGA.{cohort}.sampleMap_HiSeqV2")
-if os.path.exists(base_expr_file):
-    expr_file = base_expr_file
-elif os.path.exists(base_expr_file + ".tsv"):
-    expr_file = base_expr_file + ".tsv"
-elif os.path.exists(base_expr_file + ".txt"):
-    expr_file = base_expr_file + ".txt"
-else:
-    raise FileNotFoundError(f"❌ Expression file not found for {cohort} at: {base_expr_file}[.tsv/.txt]")
-
+expr_file = resolve_path(expression_path(cohort), "Expression")
 print(f"✅ Expression file used: {expr_file}")
-full_expr_df = pd.read_csv(expr_file, sep="\t", index_col=0)
-expr_df = full_expr_df.loc[["PRRG2"]].T
+expr_df = gene_vector(load_expression(cohort, genes=["PRRG2"]), "PRRG2").to_frame()
 expr_df.index = expr_df.index.str[:12]
-expr_df.columns = ["PRRG2"]
 
 # -------------------------
 # Load clinical metadata
 # -------------------------
-clinical_file = os.path.join(metadata_dir, f"TCGA.{cohort}.sampleMap_{cohort}_clinicalMatrix")
-if not os.path.exists(clinical_file):
-    raise FileNotFoundError(f"❌ Clinical file not found: {clinical_file}")
-clinical_df = pd.read_csv(clinical_file, sep="\t", index_col=0)
+clinical_df = load_clinical(cohort)
 clinical_df.index = clinical_df.index.str[:12]
 
 # -------------------------
 # Load survival metadata
 # -------------------------
-survival_df = pd.read_csv(os.path.join(metadata_dir, "survival_tcga_cdr.tsv"), sep="\t")
+survival_df = load_survival()
 survival_df.set_index("_PATIENT", inplace=True)
 merged_clinical = clinical_df.join(survival_df, how="left")
 
@@ -97,9 +86,13 @@ coexp_df = pd.read_csv(coexp_path, names=["gene", "correlation"], header=0)
 # -------------------------
 # Load KEGG enrichment results
 # -------------------------
-gsea_path = os.path.join(tables_dir, f"{cohort}_PRRG2_kegg_enrichment.csv")
-if not os.path.exists(gsea_path):
-    raise FileNotFoundError(f"❌ KEGG enrichment file not found: {gsea_path}")
+# Stage 04 names tables after the gene-set library (e.g. ..._kegg-2021-human_enrichment.csv);
+# use the most recent KEGG one
+gsea_pattern = os.path.join(tables_dir, f"{cohort}_PRRG2_kegg*_enrichment.csv")
+gsea_paths = sorted(glob.glob(gsea_pattern), key=os.path.getmtime)
+if not gsea_paths:
+    raise FileNotFoundError(f"❌ KEGG enrichment file not found: {gsea_pattern}")
+gsea_path = gsea_paths[-1]
 gsea_df = pd.read_csv(gsea_path)
 
 # -------------------------
@@ -1,9 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import ttest_ind
 import os
 import sys
+from tcga_data import resolve_path, expression_path, load_expression, gene_vector, seed_random
+from tcga_results import ResultsStore
 
 # === USAGE ===
 if len(sys.argv) != 3:
@@ -16,21 +17,25 @@ gene = sys.argv[2].upper()    # e.g., PRRG2
 # === RESOLVE PATH TO EXPRESSION FILE ===
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(script_dir, "..", ".."))
-expr_path = os.path.join(project_root, "data", "processed", f"TCGA.{cohort}.sampleMap_HiSeqV2")
 
-# Check for optional .tsv extension
-if not os.path.exists(expr_path) and os.path.exists(expr_path + ".tsv"):
-    expr_path += ".tsv"
-
-# Validate path
-if not os.path.exists(expr_path):
-    print(f"❌ Expression file not found at expected path:\n{expr_path}")
+# Validate path (bare name, then .tsv/.txt fallbacks)
+try:
+    expr_path = resolve_path(expression_path(cohort), "Expression")
+except FileNotFoundError as e:
+    print(e)
     sys.exit(1)
 
 print(f"📂 Loading expression matrix from: {expr_path}")
 
-# === LOAD EXPRESSION MATRIX ===
-df = pd.read_csv(expr_path, sep="\t", index_col=0).T  # Samples as rows
+# === LOAD EXPRESSION MATRIX (gene row only, genes x samples) ===
+expr = load_expression(cohort, genes=[gene])
+
+# === GENE VALIDATION ===
+if gene not in expr.index:
+    print(f"❌ Gene '{gene}' not found in expression matrix.")
+    sys.exit(1)
+
+df = gene_vector(expr, gene, "Expression").to_frame()  # Samples as rows
 
 # === LABEL SAMPLE TYPES FROM BARCODE ===
 def label_sample(sample_id):
@@ -40,14 +45,8 @@ def label_sample(sample_id):
 df["SampleType"] = df.index.map(label_sample)
 df = df[df["SampleType"].isin(["Tumor", "Normal"])]  # Keep only Tumor and Normal
 
-# === GENE VALIDATION ===
-if gene not in df.columns:
-    print(f"❌ Gene '{gene}' not found in expression matrix.")
-    sys.exit(1)
-
-df["Expression"] = df[gene]
-
 # === PLOTTING ===
+seed_random()  # reproducible stripplot jitter ($TCGA_SEED)
 sns.set(style="whitegrid")
 plt.figure(figsize=(6, 5))
 sns.boxplot(data=df, x="SampleType", y="Expression", palette="Set2")
@@ -57,6 +56,12 @@ sns.stripplot(data=df, x="SampleType", y="Expression", color='black', alpha=0.4,
 tumor_vals = df[df["SampleType"] == "Tumor"]["Expression"]
 normal_vals = df[df["SampleType"] == "Normal"]["Expression"]
 t_stat, p_val = ttest_ind(tumor_vals, normal_vals, equal_var=False)
+ResultsStore().append(cohort, "tumor_vs_normal", gene, {
+    "welch_t": t_stat,
+    "welch_p": p_val,
+    "n_tumor": len(tumor_vals),
+    "n_normal": len(normal_vals),
+})
 
 # === Annotate plot ===
 plt.title(f"{gene} in {cohort}: Tumor vs. Normal\np = {p_val:.2e}")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""
+Script: 09_signature_scoring.py
+
+Description:
+    Scores every sample of a TCGA cohort for a set of immune and cell-type
+    gene signatures (GMT file), producing a sample x signature matrix per
+    scoring method. Supported methods are the mean z-score of the signature
+    genes and single-sample GSEA (ssGSEA). The score matrices are cached and
+    can be used as targets or covariates in the survival (02) and
+    co-expression (03) stages via --signature / --covariate.
+
+Usage:
+    python3 09_signature_scoring.py --cohort LUAD [--gmt FILE] [--method zscore ssgsea] [--workers 8]
+
+Inputs:
+    - --cohort: TCGA cancer type abbreviation (e.g., LUAD, KIRC)
+    - --gmt: signature file (default: signatures/immune_signatures.gmt)
+    - Expression file located at: data/processed/TCGA.<COHORT>.sampleMap_HiSeqV2
+
+Outputs:
+    - results/tables/<COHORT>_<GMT>_<method>_scores.tsv (samples x signatures)
+
+This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
+
+Requirements:
+    - pandas, numpy
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import argparse
+import os
+from tcga_data import load_expression
+from tcga_signatures import DEFAULT_GMT, METHODS, read_gmt, scores_current, scores_path, signature_scores
+
+def main():
+    parser = argparse.ArgumentParser(description="Immune/cell-type signature scoring for a TCGA cohort.")
+    parser.add_argument('--cohort', required=True, help="TCGA cohort (e.g., KIRC)")
+    parser.add_argument('--gmt', default=DEFAULT_GMT, help="GMT file of signatures (default: %(default)s)")
+    parser.add_argument('--method', nargs='+', choices=METHODS, default=list(METHODS),
+                        help="Scoring methods (default: all)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for ssGSEA (default: 1)")
+    parser.add_argument('--refresh', action='store_true', help="Recompute even if cached scores are current")
+    args = parser.parse_args()
+
+    cohort = args.cohort.upper()
+    if not os.path.exists(args.gmt):
+        raise FileNotFoundError(f"❌ GMT file not found: {args.gmt}")
+    print(f"✅ {len(read_gmt(args.gmt))} signatures read from {args.gmt}")
+
+    # Load the expression matrix once, and only if some scores must be computed
+    stale = [m for m in args.method if args.refresh or not scores_current(cohort, m, args.gmt)]
+    expr = load_expression(cohort) if stale else None
+    for method in args.method:
+        scores = signature_scores(cohort, method, args.gmt, args.workers, matrix=expr, refresh=args.refresh)
+        print(f"✅ {method} scores ({scores.shape[0]} samples x {scores.shape[1]} signatures) saved to:\n"
+              f"{scores_path(cohort, method, args.gmt)}")
+
+if __name__ == "__main__":
+    main()
@@ -18,9 +18,15 @@ fi
 COHORT=$1
 GENE=$2
 
+# All stages append to the results database under one run id
+export TCGA_RUN_ID="${COHORT}_${GENE}_$(date +%Y%m%d%H%M%S)"
+
 echo "🔍 Running TCGA pipeline for gene: $GENE | cohort: $COHORT"
 echo "------------------------------------------------------------"
 
+# 00 - Stage any missing inputs (existing files are left untouched)
+python3 tcga_fetch.py $COHORT
+
 # 01 - Descriptive summary (full cohort gene statistics)
 python3 01_descriptive_summary.py $COHORT
 
@@ -45,4 +51,7 @@ python3 07_generate_visuals.py --cohort $COHORT
 # 08 - Tumor vs. normal boxplot for PRRG2 expression
 python3 08_plot_tumor_vs_normal.py $COHORT $GENE
 
+# 09 - Immune/cell-type signature scores (mean z-score and ssGSEA)
+python3 09_signature_scoring.py --cohort $COHORT
+
 echo "HIGH-FIVE, GREAT SUCCESS! ITS GOOD! ✅ PIPELINE COMPLETE for $GENE in $COHORT"
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+
+"""
+Script: tcga_bundle.py
+
+Description:
+    Reproducible run bundles and golden-output regression checks.
+
+    record — runs pipeline stages for a cohort and gene and saves what is
+    needed to repeat and check the run in results/bundles/<BUNDLE>/:
+
+    — manifest.json: SHA-256 of every input (matrices, clinical and survival
+      tables, signature GMT, local enrichment GMT), the arguments of each
+      stage, the random seed, the BLAS thread count, Python and library
+      versions, the Enrichr library queried by stage 04, and hashes of the
+      toolkit's own scripts
+    — outputs/: a copy of every table and figure the stages wrote
+    — results.sqlite: the statistics the stages recorded (tcga_results)
+
+    replay — checks that the inputs still hash the same, re-runs the stages
+    with the recorded arguments, seed and thread count, and compares every
+    output. Byte-identical files pass outright. Tables and recorded
+    statistics are compared value by value within --rtol/--atol, since a
+    different summation order can move the last bits. Figures that are not
+    byte-identical are reported but not compared. Outputs of a live Enrichr
+    query (stage 04) follow Enrichr's library releases, so their differences
+    are warnings rather than failures; pass a local GMT via --gene-sets to
+    make enrichment reproducible too. Replaying rewrites the files in
+    results/, as a normal run does.
+
+    golden — fast regression check of the optimized engines against their
+    reference implementations on the same data (a cohort's expression
+    matrix, or a synthetic one): compact-dtype and row-filtered loading
+    against a float64 pandas parse, the float32 descriptive summary,
+    vectorized and multiprocess Pearson correlation, and vectorized ssGSEA.
+
+Usage:
+    python3 tcga_bundle.py record --cohort LUAD --gene PRRG2 [--stages 01 02 03] [--seed 0] [--gene-sets FILE]
+    python3 tcga_bundle.py replay LUAD_PRRG2_20250611120000 [--rtol 1e-6] [--atol 1e-9]
+    python3 tcga_bundle.py golden [--cohort LUAD] [--genes 2000]
+
+This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
+
+Requirements:
+    - pandas, numpy, scipy
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from tcga_data import (PROJECT_DIR, RANDOM_SEED, clinical_path, cnv_path, expression_path, load_expression,
+                       methylation_path, open_input, probe_map_path, resolve_path, survival_path)
+from tcga_results import ResultsStore
+from tcga_signatures import DEFAULT_GMT, ssgsea_batch, ssgsea_batch_reference
+from tcga_stats import coexpression, describe_rows, describe_rows_reference, pearson_rows, pearson_rows_reference
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(PROJECT_DIR, "results")
+BUNDLES_DIR = os.path.join(RESULTS_DIR, "bundles")
+MANIFEST = "manifest.json"
+
+# Stage scripts and their arguments, in run_pipeline.sh order. Input fetching
+# is left out: a bundle pins its inputs by hash instead.
+STAGES = {
+    "01": ("01_descriptive_summary.py", ["{cohort}"]),
+    "02": ("02_survival_analysis.py", ["--gene", "{gene}", "--cohort", "{cohort}"]),
+    "03": ("03_coexpression_analysis.py", ["--gene", "{gene}", "--cohort", "{cohort}"]),
+    "04": ("04_enrichment_analysis.py", ["--gene", "{gene}", "--cohort", "{cohort}", "--gene-sets", "{gene_sets}"]),
+    "05": ("05_multiomics_comparison.py", ["{cohort}"]),
+    "06": ("06_multiomics_visualization.py", ["{cohort}"]),
+    "07": ("07_generate_visuals.py", ["--cohort", "{cohort}"]),
+    "08": ("08_plot_tumor_vs_normal.py", ["{cohort}", "{gene}"]),
+    "09": ("09_signature_scoring.py", ["--cohort", "{cohort}", "--gmt", "{gmt}", "--refresh"]),
+}
+
+# Enrichr library queried by stage 04 unless a local GMT file is given
+ENRICHR_LIBRARY = "KEGG_2021_Human"
+
+# Distributions whose installed versions are recorded in the manifest
+LIBRARIES = ("numpy", "pandas", "scipy", "lifelines", "matplotlib", "seaborn", "plotly", "gseapy", "zstandard")
+
+# BLAS/OpenMP thread counts, pinned so reductions are summed in the same order on replay
+THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+TABLE_EXTENSIONS = (".csv", ".tsv", ".txt")
+
+
+# -------------------------
+# Hashing and environment
+# -------------------------
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _rel(path):
+    return os.path.relpath(os.path.abspath(path), PROJECT_DIR)
+
+
+def file_record(path):
+    return {"path": _rel(path), "sha256": sha256(path), "bytes": os.path.getsize(path)}
+
+
+def input_files(cohort, gmt, gene_sets):
+    """Every staged input a run of the pipeline can read, as {label: path}."""
+    bases = {
+        "expression": expression_path(cohort),
+        "cnv": cnv_path(cohort),
+        "methylation": methylation_path(cohort),
+        "clinical": clinical_path(cohort),
+        "probe_map": probe_map_path(),
+        "survival": survival_path(),
+    }
+    files = {}
+    for label, base in bases.items():
+        try:
+            files[label] = resolve_path(base, label)
+        except FileNotFoundError:
+            print(f"⚠️ No {label} input staged for {cohort}; not recorded.")
+    files["signatures_gmt"] = gmt
+    if os.path.isfile(gene_sets):
+        files["enrichment_gmt"] = gene_sets
+    return files
+
+
+def library_versions():
+    versions = {"python": platform.python_version()}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def code_hashes():
+    """SHA-256 of the toolkit's scripts, modules and pipeline runner."""
+    paths = sorted(glob.glob(os.path.join(SCRIPT_DIR, "*.py")) + glob.glob(os.path.join(SCRIPT_DIR, "*.sh")))
+    return {os.path.basename(path): sha256(path) for path in paths}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -------------------------
+# Running stages
+# -------------------------
+
+def snapshot_outputs():
+    """{path: (mtime, size)} of files under results/, excluding bundles and results databases."""
+    files = {}
+    for root, dirs, names in os.walk(RESULTS_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != BUNDLES_DIR]
+        for name in names:
+            if name.endswith((".sqlite", ".sqlite-journal")):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def stage_env(seed, threads, run_id, db_path):
+    env = dict(os.environ, TCGA_SEED=str(seed), TCGA_RUN_ID=run_id, TCGA_RESULTS_DB=db_path,
+               PYTHONHASHSEED=str(seed), MPLBACKEND="Agg")
+    env.update({var: str(threads) for var in THREAD_VARS})
+    return env
+
+
+def run_stage(script, argv, env):
+    """Run one stage script from the project directory; return (exit code, seconds, files written)."""
+    before = snapshot_outputs()
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(SCRIPT_DIR, script)] + argv, cwd=PROJECT_DIR, env=env)
+    seconds = time.perf_counter() - start
+    after = snapshot_outputs()
+    return result.returncode, seconds, sorted(path for path, stat in after.items() if before.get(path) != stat)
+
+
+def write_manifest(bundle_dir, manifest):
+    with open(os.path.join(bundle_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def record(args):
+    cohort = args.cohort.upper()
+    bundle_id = args.name or f"{cohort}_{args.gene}_{datetime.now():%Y%m%d%H%M%S}"
+    bundle_dir = os.path.join(BUNDLES_DIR, bundle_id)
+    if os.path.exists(bundle_dir):
+        raise FileExistsError(f"❌ Bundle already exists: {bundle_dir}")
+    os.makedirs(os.path.join(bundle_dir, "outputs"))
+
+    # File arguments are stored relative to the project directory, where stages are run
+    local_gene_sets = os.path.isfile(args.gene_sets)
+    params = {
+        "cohort": cohort,
+        "gene": args.gene,
+        "gmt": _rel(args.gmt),
+        "gene_sets": _rel(args.gene_sets) if local_gene_sets else args.gene_sets,
+    }
+    manifest = {
+        "bundle": bundle_id,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "params": params,
+        "seed": args.seed,
+        "threads": args.threads,
+        "enrichment": {
+            "gene_sets": params["gene_sets"],
+            "source": "local GMT" if local_gene_sets else "Enrichr (live)",
+            "queried": datetime.now().strftime("%Y-%m-%d"),
+        },
+        "environment": {
+            "platform": platform.platform(),
+            "libraries": library_versions(),
+            "git_commit": git_commit(),
+            "code": code_hashes(),
+        },
+        "inputs": {label: file_record(path) for label, path in input_files(cohort, args.gmt, args.gene_sets).items()},
+        "stages": [],
+    }
+    print(f"✅ Hashed {len(manifest['inputs'])} inputs")
+
+    env = stage_env(args.seed, args.threads, bundle_id, os.path.join(bundle_dir, "results.sqlite"))
+    for stage in args.stages:
+        script, template = STAGES[stage]
+        argv = [arg.format(**params) for arg in template]
+        print(f"▶️ {stage}: {script} {' '.join(argv)}")
+        code, seconds, outputs = run_stage(script, argv, env)
+
+        for path in outputs:
+            copy = os.path.join(bundle_dir, "outputs", _rel(path))
+            os.makedirs(os.path.dirname(copy), exist_ok=True)
+            shutil.copy2(path, copy)
+        manifest["stages"].append({
+            "stage": stage, "script": script, "args": argv, "exit_code": code,
+            "seconds": round(seconds, 3), "outputs": [file_record(path) for path in outputs],
+        })
+        write_manifest(bundle_dir, manifest)
+        if code != 0:
+            raise SystemExit(f"❌ Stage {stage} failed (exit code {code}); partial bundle saved to:\n{bundle_dir}")
+
+    n_outputs = sum(len(stage["outputs"]) for stage in manifest["stages"])
+    print(f"✅ Bundle {bundle_id} ({len(args.stages)} stages, {n_outputs} outputs) saved to:\n{bundle_dir}")
+
+
+# -------------------------
+# Comparing outputs
+# -------------------------
+
+def compare_values(expected, actual, rtol, atol):
+    """Return (within tolerance, max absolute difference) for two numeric arrays; NaNs must match."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.shape != actual.shape:
+        return False, np.inf
+    ok = bool(np.allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True))
+    finite = np.isfinite(expected) & np.isfinite(actual)
+    diff = np.abs(expected[finite] - actual[finite])
+    return ok, float(diff.max()) if diff.size else 0.0
+
+
+def compare_tables(expected_path, actual_path, rtol, atol):
+    """Compare two CSV/TSV tables column by column; return (ok, detail)."""
+    sep = "," if expected_path.endswith(".csv") else "\t"
+    expected = pd.read_csv(expected_path, sep=sep)
+    actual = pd.read_csv(actual_path, sep=sep)
+    if expected.shape != actual.shape or list(expected.columns) != list(actual.columns):
+        return False, f"shape or columns differ ({expected.shape} vs {actual.shape})"
+
+    worst = 0.0
+    for column in expected.columns:
+        a, b = expected[column], actual[column]
+        if is_numeric_dtype(a) and is_numeric_dtype(b):
+            ok, diff = compare_values(a, b, rtol, atol)
+            if not ok:
+                return False, f"column '{column}' differs (max |Δ| {diff:.3g})"
+            worst = max(worst, diff)
+        elif not a.astype(str).equals(b.astype(str)):
+            return False, f"column '{column}' differs"
+    return True, f"max |Δ| {worst:.3g}"
+
+
+def compare_output(expected_path, actual_path, recorded_hash, rtol, atol):
+    """Return (status, detail); status is identical, close, differs (not a table) or failed."""
+    if not os.path.exists(actual_path):
+        return "failed", "not written"
+    if sha256(actual_path) == recorded_hash:
+        return "identical", ""
+    if not actual_path.endswith(TABLE_EXTENSIONS):
+        return "differs", "not byte-identical (not compared)"
+    ok, detail = compare_tables(expected_path, actual_path, rtol, atol)
+    return ("close" if ok else "failed"), detail
+
+
+def recorded_stats(db_path):
+    """Latest value of every statistic in a results database, keyed by cohort/stage/gene/feature/statistic."""
+    rows = ResultsStore(db_path).query()
+    values = rows.set_index(["cohort", "stage", "gene", "feature", "statistic"])["value"]
+    return values[~values.index.duplicated(keep="last")]
+
+
+def replay(args):
+    bundle_dir = args.bundle if os.path.isdir(args.bundle) else os.path.join(BUNDLES_DIR, args.bundle)
+    manifest_path = os.path.join(bundle_dir, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"❌ No bundle manifest found: {manifest_path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    failures = warnings_ = 0
+
+    # 1. Inputs must be the ones the bundle was recorded from
+    drift = []
+    for label, entry in manifest["inputs"].items():
+        path = os.path.join(PROJECT_DIR, entry["path"])
+        if not os.path.exists(path):
+            drift.append(f"{label}: {entry['path']} is missing")
+        elif sha256(path) != entry["sha256"]:
+            drift.append(f"{label}: {entry['path']} has changed")
+    for line in drift:
+        print(f"❌ Input {line}")
+    if drift and not args.allow_input_changes:
+        raise SystemExit("❌ Inputs differ from the bundle; restore them or pass --allow-input-changes")
+    if not drift:
+        print(f"✅ All {len(manifest['inputs'])} inputs match their recorded hashes")
+    failures += len(drift)
+
+    # 2. Environment differences are reported, not enforced
+    current = library_versions()
+    for name, version in manifest["environment"]["libraries"].items():
+        if current.get(name) != version:
+            print(f"⚠️ {name} {current.get(name)} installed; bundle recorded {version}")
+    recorded_code = manifest["environment"]["code"]
+    changed = sorted(name for name, digest in code_hashes().items() if recorded_code.get(name) != digest)
+    if changed:
+        print(f"ℹ️ Code changed since recording: {', '.join(changed)}")
+
+    # 3. Re-run the stages exactly as recorded
+    db_path = os.path.join(bundle_dir, "replay.sqlite")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    env = stage_env(manifest["seed"], manifest["threads"], f"{manifest['bundle']}_replay", db_path)
+    for stage in manifest["stages"]:
+        print(f"▶️ {stage['stage']}: {stage['script']} {' '.join(stage['args'])}")
+        code, seconds, _ = run_stage(stage["script"], stage["args"], env)
+        if code != 0:
+            print(f"❌ Stage {stage['stage']} failed (exit code {code})")
+            failures += 1
+        else:
+            print(f"✅ Stage {stage['stage']} finished in {seconds:.1f}s (recorded {stage['seconds']:.1f}s)")
+
+    # 4. Compare outputs; live Enrichr results may legitimately differ
+    live_enrichr = manifest["enrichment"]["source"] == "Enrichr (live)"
+    for stage in manifest["stages"]:
+        for output in stage["outputs"]:
+            status, detail = compare_output(os.path.join(bundle_dir, "outputs", output["path"]),
+                                            os.path.join(PROJECT_DIR, output["path"]),
+                                            output["sha256"], args.rtol, args.atol)
+            if status == "failed" and stage["stage"] == "04" and live_enrichr:
+                status, detail = "differs", f"{detail} (live Enrichr library)"
+            if status == "failed":
+                failures += 1
+            elif status == "differs":
+                warnings_ += 1
+            mark = {"identical": "✅", "close": "✅", "differs": "⚠️", "failed": "❌"}[status]
+            print(f"{mark} {output['path']}: {status} {detail}".rstrip())
+
+    # 5. Compare the statistics recorded in the results database
+    expected = recorded_stats(os.path.join(bundle_dir, "results.sqlite"))
+    actual = recorded_stats(db_path)
+    for stage_name in sorted(set(expected.index.get_level_values("stage"))):
+        exp = expected.xs(stage_name, level="stage", drop_level=False)
+        act = actual.reindex(exp.index)
+        ok, diff = compare_values(exp.to_numpy(), act.to_numpy(), args.rtol, args.atol)
+        if ok:
+            print(f"✅ Statistics '{stage_name}': {len(exp)} values within tolerance (max |Δ| {diff:.3g})")
+        elif stage_name == "enrichment" and live_enrichr:
+            warnings_ += 1
+            print(f"⚠️ Statistics '{stage_name}' differ (live Enrichr library)")
+        else:
+            failures += 1
+            print(f"❌ Statistics '{stage_name}' differ (max |Δ| {diff:.3g}, {int(act.isna().sum())} missing)")
+
+    if failures:
+        raise SystemExit(f"❌ Replay of {manifest['bundle']}: {failures} failure(s), {warnings_} warning(s)")
+    print(f"✅ Replay of {manifest['bundle']} reproduced all checked outputs ({warnings_} warning(s))")
+
+
+# -------------------------
+# Golden-output checks
+# -------------------------
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # constant rows: NaN results in both implementations
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def golden(args):
+    rng = np.random.default_rng(args.seed)
+    results = []
+
+    def check(name, expected, actual, rtol, atol, times=None):
+        ok, diff = compare_values(expected, actual, rtol, atol)
+        timing = f" ({times[0] * 1000:.0f} ms vs {times[1] * 1000:.0f} ms reference)" if times else ""
+        print(f"{'✅' if ok else '❌'} {name}: max |Δ| {diff:.2e}{timing}")
+        results.append(ok)
+
+    if args.cohort:
+        cohort = args.cohort.upper()
+        path = resolve_path(expression_path(cohort), "Expression")
+        matrix, fast = _timed(load_expression, cohort)
+        with open_input(path) as f:
+            reference, slow = _timed(pd.read_csv, f, sep="\t", index_col=0)   # pandas defaults: float64
+        same_labels = (list(matrix.index.astype(str)) == list(reference.index.astype(str))
+                       and list(matrix.columns.astype(str)) == list(reference.columns.astype(str)))
+        print(f"{'✅' if same_labels else '❌'} load_expression: gene and sample labels match the reference parse")
+        results.append(same_labels)
+        check("load_expression (float32) vs float64 parse", reference.to_numpy(), matrix.to_numpy(),
+              rtol=1e-6, atol=1e-6, times=(fast, slow))
+
+        subset = list(reference.index[rng.choice(len(reference), size=min(50, len(reference)), replace=False)])
+        filtered = load_expression(cohort, genes=subset)
+        check("load_expression(genes=...) vs full load", matrix[matrix.index.isin(subset)].to_numpy(),
+              filtered.to_numpy(), rtol=0, atol=0)
+        matrix = matrix.iloc[:args.genes]
+    else:
+        print(f"ℹ️ No --cohort given; using a synthetic {args.genes} x {args.samples} matrix")
+        matrix = pd.DataFrame(
+            rng.normal(8.0, 2.0, size=(args.genes, args.samples)).astype(np.float32),
+            index=pd.CategoricalIndex([f"GENE{i}" for i in range(args.genes)], name="gene"),
+            columns=pd.CategoricalIndex([f"TCGA-00-{i:04d}-01" for i in range(args.samples)], name="sample"),
+        )
+
+    # Descriptive summary: float32 reductions (stage 01) vs float64
+    summary, fast = _timed(describe_rows, matrix)
+    reference, slow = _timed(describe_rows_reference, matrix)
+    check("describe_rows (float32) vs float64 reference", reference.to_numpy(), summary.to_numpy(),
+          rtol=1e-5, atol=1e-4, times=(fast, slow))
+
+    # Vectorized Pearson correlation vs scipy.stats.pearsonr per gene
+    values = matrix.to_numpy()
+    target = int(rng.integers(len(matrix)))
+    (r, p), fast = _timed(pearson_rows, values, values[target])
+    (r_ref, p_ref), slow = _timed(pearson_rows_reference, values, values[target])
+    check("pearson_rows r vs pearsonr", r_ref, r, rtol=1e-9, atol=1e-12, times=(fast, slow))
+    check("pearson_rows p vs pearsonr", p_ref, p, rtol=1e-7, atol=1e-15)
+
+    # Shared-memory process pool vs single process
+    gene = matrix.index[target]
+    single, fast = _timed(coexpression, matrix, gene)
+    pooled, slow = _timed(coexpression, matrix, gene, workers=2)
+    check("coexpression workers=2 vs workers=1", single.to_numpy(), pooled.to_numpy(), rtol=1e-12, atol=1e-15)
+
+    # Vectorized ssGSEA vs the one-sample, one-signature reference
+    block = matrix.dropna().iloc[:300, :4].to_numpy(dtype=np.float64)
+    member_rows = [np.sort(rng.choice(len(block), size=int(rng.integers(10, 30)), replace=False)) for _ in range(5)]
+    scores, fast = _timed(ssgsea_batch, block, member_rows)
+    reference, slow = _timed(ssgsea_batch_reference, block, member_rows)
+    check("ssgsea_batch vs reference", reference, scores, rtol=1e-9, atol=1e-12, times=(fast, slow))
+
+    if not all(results):
+        raise SystemExit(f"❌ {results.count(False)} of {len(results)} golden checks failed")
+    print(f"✅ All {len(results)} golden checks passed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, replay and regression-check reproducible TCGA runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("record", help="Run stages and save a reproducible bundle")
+    p.add_argument('--cohort', required=True, help="TCGA cohort (e.g., LUAD)")
+    p.add_argument('--gene', required=True, help="Gene of interest (e.g., PRRG2)")
+    p.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help="Stages to run (default: all)")
+    p.add_argument('--seed', type=int, default=RANDOM_SEED, help="Random seed ($TCGA_SEED, default: %(default)s)")
+    p.add_argument('--threads', type=int, default=1, help="BLAS/OpenMP threads per stage (default: 1)")
+    p.add_argument('--gmt', default=DEFAULT_GMT, help="Signature GMT file for stage 09 (default: %(default)s)")
+    p.add_argument('--gene-sets', default=ENRICHR_LIBRARY,
+                   help="Enrichr library or local GMT for stage 04 (default: %(default)s)")
+    p.add_argument('--name', help="Bundle name (default: <COHORT>_<GENE>_<timestamp>)")
+
+    p = commands.add_parser("replay", help="Re-run a bundle and compare its outputs")
+    p.add_argument('bundle', help="Bundle name or directory")
+    p.add_argument('--rtol', type=float, default=1e-6, help="Relative tolerance (default: %(default)s)")
+    p.add_argument('--atol', type=float, default=1e-9, help="Absolute tolerance (default: %(default)s)")
+    p.add_argument('--allow-input-changes', action='store_true', help="Replay even if input hashes differ")
+
+    p = commands.add_parser("golden", help="Check optimized engines against reference implementations")
+    p.add_argument('--cohort', help="Cohort whose expression matrix to use (default: synthetic data)")
+    p.add_argument('--genes', type=int, default=2000, help="Genes used for the reference checks (default: %(default)s)")
+    p.add_argument('--samples', type=int, default=200, help="Samples of the synthetic matrix (default: %(default)s)")
+    p.add_argument('--seed', type=int, default=RANDOM_SEED, help="Seed for gene and signature sampling")
+
+    args = parser.parse_args()
+    {"record": record, "replay": replay, "golden": golden}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
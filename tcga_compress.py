@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+Script: tcga_compress.py
+
+Description:
+    Re-compresses TCGA matrices into independently compressed, line-aligned
+    blocks and writes a `<file>.blocks` index next to them. The output is
+    still an ordinary .gz / .zst / .bz2 file (concatenated members/frames/
+    streams) that any standard tool can read, but with the index the
+    tcga_data loaders decompress and parse the blocks in parallel.
+
+    Inputs may be plain text or already compressed (e.g. the single-stream
+    .gz files distributed by UCSC Xena).
+
+Usage:
+    python3 tcga_compress.py <FILE> [<FILE> ...] [OPTIONS]
+    Example: python3 tcga_compress.py data/processed/TCGA.LUAD.sampleMap_HumanMethylation450
+    Example: python3 tcga_compress.py data/processed/*HiSeqV2.gz --codec zst --replace
+
+Outputs:
+    - <FILE without compression suffix>.<codec>
+    - <FILE without compression suffix>.<codec>.blocks (tab-separated offset/length per block)
+
+This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
+
+Requirements:
+    - zstandard (optional, for --codec zst)
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from tcga_data import (
+    BLOCK_INDEX_SUFFIX, COMPRESSION_SUFFIXES, DECOMPRESS_WORKERS, compress_block, compression_suffix, open_input,
+)
+
+# Lines per block: ~1-4 MB of text for expression/methylation rows
+DEFAULT_BLOCK_LINES = 2000
+
+
+def _blocks(f, block_lines):
+    """Yield consecutive runs of `block_lines` whole lines from a binary stream."""
+    while True:
+        lines = list(islice(f, block_lines))
+        if not lines:
+            return
+        yield b"".join(lines)
+
+
+def compress_file(path, codec=".gz", block_lines=DEFAULT_BLOCK_LINES, level=6, workers=DECOMPRESS_WORKERS):
+    """
+    Write `path` as a block-compressed file plus its block index.
+
+    Blocks are compressed on a thread pool (all three codecs release the
+    GIL) and written in order, with at most two blocks per worker in flight
+    so memory stays bounded on multi-GB methylation matrices. An input that
+    already has the target codec is rewritten in place. Returns the output path.
+    """
+    suffix = compression_suffix(path)
+    out_path = (path[:-len(suffix)] if suffix else path) + codec
+
+    index = []
+    pending = deque()
+    try:
+        with open_input(path) as src, open(out_path + ".tmp", "wb") as out, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            def write_next():
+                block = pending.popleft().result()
+                offset = index[-1][0] + index[-1][1] if index else 0
+                out.write(block)
+                index.append((offset, len(block)))
+
+            for data in _blocks(src, block_lines):
+                pending.append(pool.submit(compress_block, codec, data, level))
+                if len(pending) >= 2 * workers:
+                    write_next()
+            while pending:
+                write_next()
+    except BaseException:
+        if os.path.exists(out_path + ".tmp"):
+            os.remove(out_path + ".tmp")
+        raise
+
+    # Replace the data before writing its index, so an interrupted run never
+    # leaves a new index next to the old file
+    index_path = out_path + BLOCK_INDEX_SUFFIX
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.replace(out_path + ".tmp", out_path)
+    with open(index_path + ".tmp", "w") as f:
+        f.writelines(f"{o}\t{n}\n" for o, n in index)
+    os.replace(index_path + ".tmp", index_path)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block-compress TCGA matrices for parallel loading.")
+    parser.add_argument('files', nargs='+', help="Matrix files (plain or .gz/.zst/.bz2)")
+    parser.add_argument('--codec', choices=[s.lstrip(".") for s in COMPRESSION_SUFFIXES[1:]], default="gz",
+                        help="Output compression (default: gz)")
+    parser.add_argument('--block-lines', type=int, default=DEFAULT_BLOCK_LINES,
+                        help="Lines per independently compressed block (default: %(default)s)")
+    parser.add_argument('--level', type=int, default=None, help="Compression level (codec default if omitted)")
+    parser.add_argument('--replace', action='store_true',
+                        help="Delete each input once its output is written (same-codec inputs are always rewritten in place)")
+    args = parser.parse_args()
+
+    codec = "." + args.codec
+    level = args.level if args.level is not None else {".gz": 6, ".bz2": 9, ".zst": 3}[codec]
+    failed = 0
+    for path in args.files:
+        try:
+            in_size = os.path.getsize(path)
+            out_path = compress_file(path, codec, args.block_lines, level)
+        except Exception as e:
+            print(f"❌ Failed to compress {path}:\n{e!r}")
+            failed += 1
+            continue
+        if args.replace and out_path != path:
+            os.remove(path)
+            if os.path.exists(path + BLOCK_INDEX_SUFFIX):
+                os.remove(path + BLOCK_INDEX_SUFFIX)
+        print(f"✅ {out_path} ({os.path.getsize(out_path) / max(in_size, 1):.0%} of input)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
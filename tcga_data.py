@@ -0,0 +1,328 @@
+"""
+Module: tcga_data.py
+
+Description:
+    Shared data-access layer for the TCGA stage scripts. Loads UCSC Xena
+    matrices with explicit compact dtypes instead of pandas' float64 default:
+
+    — Expression (HiSeqV2):             float32
+    — Copy number (GISTIC2 thresholded): int8
+    — Methylation (HumanMethylation450): float32 beta values
+
+    Matrices are kept in the gene-major layout they are distributed in
+    (features as rows, samples as columns), so stages no longer need to
+    transpose (and copy) the whole frame. Feature and sample labels are
+    exposed as categorical indexes. When a stage only needs a handful of
+    genes or probes, pass them via `genes=` / `probes=` and the file is
+    streamed in chunks, keeping only the requested rows in memory.
+
+    Every input may also be stored compressed (`.gz`, `.zst`, `.bz2`). A
+    compressed matrix with a `<file>.blocks` index (written by
+    tcga_compress.py) is decompressed and parsed block-by-block on a thread
+    pool; without an index it is decompressed as a single stream.
+
+    Plot stages call `seed_random()` so random plot elements (stripplot
+    jitter) are the same on every run; the seed comes from $TCGA_SEED.
+
+Usage:
+    from tcga_data import load_expression, gene_vector
+    expr = load_expression("LUAD")                    # genes x samples, float32
+    prrg2 = gene_vector(load_expression("LUAD", genes=["PRRG2"]), "PRRG2")
+
+Requirements:
+    - pandas, numpy
+    - zstandard (optional, for .zst inputs)
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import bz2
+import gzip
+import io
+import os
+import random
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # .zst inputs are optional
+    zstandard = None
+
+# Same project layout the stage scripts resolve (two levels up from the scripts)
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+PROCESSED_DIR = os.path.join(PROJECT_DIR, "data", "processed")
+METADATA_DIR = os.path.join(PROJECT_DIR, "data", "metadata")
+
+# Fallback extensions tried after the bare Xena file name, each of which may
+# carry a compression suffix
+MATRIX_EXTENSIONS = ("", ".tsv", ".txt")
+COMPRESSION_SUFFIXES = ("", ".gz", ".zst", ".bz2")
+
+# Sidecar listing the independently compressed blocks of a matrix
+BLOCK_INDEX_SUFFIX = ".blocks"
+
+# Threads used to decompress and parse blocks of an indexed matrix
+DECOMPRESS_WORKERS = min(8, os.cpu_count() or 1)
+
+# Seed for stochastic plot elements such as stripplot jitter (set per run by tcga_bundle.py)
+RANDOM_SEED = int(os.environ.get("TCGA_SEED", "0"))
+
+# Rows parsed per chunk when only a subset of genes/probes is requested
+CHUNK_ROWS = 20000
+
+
+def expression_path(cohort):
+    return os.path.join(PROCESSED_DIR, f"TCGA.{cohort}.sampleMap_HiSeqV2")
+
+
+def cnv_path(cohort):
+    return os.path.join(PROCESSED_DIR, f"TCGA.{cohort}.sampleMap_Gistic2_CopyNumber_Gistic2_all_thresholded.by_genes")
+
+
+def methylation_path(cohort):
+    return os.path.join(PROCESSED_DIR, f"TCGA.{cohort}.sampleMap_HumanMethylation450")
+
+
+def probe_map_path():
+    return os.path.join(PROCESSED_DIR, "probeMap_hugo_gencode_good_hg19_V24lift37_probemap")
+
+
+def clinical_path(cohort):
+    return os.path.join(METADATA_DIR, f"TCGA.{cohort}.sampleMap_{cohort}_clinicalMatrix")
+
+
+def survival_path():
+    return os.path.join(METADATA_DIR, "survival_tcga_cdr.tsv")
+
+
+def resolve_path(base_path, label="Input"):
+    """Return the first existing file among `base_path` and its fallback/compressed variants."""
+    for ext in MATRIX_EXTENSIONS:
+        for suffix in COMPRESSION_SUFFIXES:
+            if os.path.exists(base_path + ext + suffix):
+                return base_path + ext + suffix
+    raise FileNotFoundError(
+        f"❌ {label} file not found: {base_path}[.tsv/.txt][.gz/.zst/.bz2]\n"
+        f"   Stage missing inputs with: python3 tcga_fetch.py <COHORT>"
+    )
+
+
+def compression_suffix(path):
+    """Return the compression suffix of `path` ('' for plain text)."""
+    for suffix in COMPRESSION_SUFFIXES[1:]:
+        if path.endswith(suffix):
+            return suffix
+    return ""
+
+
+def require_zstandard():
+    if zstandard is None:
+        raise ImportError("❌ Reading .zst files requires the 'zstandard' package (pip install zstandard)")
+
+
+def open_input(path):
+    """Open a plain or compressed input as a binary stream (all frames/members)."""
+    codec = compression_suffix(path)
+    if codec == ".gz":
+        return gzip.open(path, "rb")
+    if codec == ".bz2":
+        return bz2.open(path, "rb")
+    if codec == ".zst":
+        require_zstandard()
+        # Buffered so the stream supports readline()/line iteration like gzip and bz2 files
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True))
+    return open(path, "rb")
+
+
+def compress_block(codec, data, level):
+    """Compress one block as an independent gzip member / bz2 stream / zstd frame."""
+    if codec == ".gz":
+        c = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return c.compress(data) + c.flush()
+    if codec == ".bz2":
+        return bz2.compress(data, level)
+    if codec == ".zst":
+        require_zstandard()
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return data
+
+
+def decompress_block(codec, data):
+    """Decompress one independently compressed block."""
+    if codec == ".gz":
+        return zlib.decompress(data, wbits=31)
+    if codec == ".bz2":
+        return bz2.decompress(data)
+    if codec == ".zst":
+        require_zstandard()
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def read_block_index(path):
+    """
+    Return [(offset, length), ...] from `<path>.blocks`, or None if there is no usable index.
+
+    An index whose blocks do not end exactly at the end of the file belongs
+    to an older version of it (e.g. re-downloaded since) and is ignored.
+    """
+    index_path = path + BLOCK_INDEX_SUFFIX
+    if not compression_suffix(path) or not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        blocks = [tuple(int(x) for x in line.split("\t")) for line in f if line.strip()]
+    if not blocks or blocks[-1][0] + blocks[-1][1] != os.path.getsize(path):
+        print(f"⚠️ Ignoring stale block index {index_path}; reading {os.path.basename(path)} as a stream.")
+        return None
+    return blocks
+
+
+def _dtypes(header, dtype):
+    dtypes = {col: dtype for col in header[1:]}
+    dtypes[header[0]] = str
+    return dtypes
+
+
+def _read_blocked(path, blocks, dtype, rows=None):
+    """
+    Decompress and parse the blocks of an indexed matrix on a thread pool.
+
+    Each block holds whole lines and the first one starts with the header,
+    so blocks can be parsed independently and concatenated in order.
+    zlib, bz2, zstandard and the pandas C parser release the GIL for most
+    of their work, so the threads overlap.
+    """
+    codec = compression_suffix(path)
+    wanted = set(rows) if rows is not None else None
+
+    def read_raw(block):
+        offset, length = block
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return decompress_block(codec, f.read(length))
+
+    first = read_raw(blocks[0])
+    header = pd.read_csv(io.BytesIO(first), sep="\t", nrows=0).columns
+    dtypes = _dtypes(header, dtype)
+
+    def parse(i):
+        data = first if i == 0 else read_raw(blocks[i])
+        chunk = pd.read_csv(io.BytesIO(data), sep="\t", header=None, names=header, dtype=dtypes,
+                            index_col=0, skiprows=1 if i == 0 else 0)
+        return chunk if wanted is None else chunk[chunk.index.isin(wanted)]
+
+    with ThreadPoolExecutor(max_workers=DECOMPRESS_WORKERS) as pool:
+        return pd.concat(list(pool.map(parse, range(len(blocks)))))
+
+
+def _read_stream(path, dtype, rows=None):
+    """Parse a plain or (unindexed) compressed matrix as a single stream."""
+    with open_input(path) as f:
+        header = pd.read_csv(f, sep="\t", nrows=0).columns
+    dtypes = _dtypes(header, dtype)
+
+    with open_input(path) as f:
+        if rows is None:
+            return pd.read_csv(f, sep="\t", dtype=dtypes, index_col=0)
+        wanted = set(rows)
+        chunks = [
+            chunk[chunk.index.isin(wanted)]
+            for chunk in pd.read_csv(f, sep="\t", dtype=dtypes, index_col=0, chunksize=CHUNK_ROWS)
+        ]
+    return pd.concat(chunks) if chunks else pd.DataFrame(columns=header[1:], dtype=dtype)
+
+
+def _read_matrix(path, dtype, rows=None, index_name="gene"):
+    """
+    Read a Xena feature x sample matrix with a fixed value dtype.
+
+    The header is read first so every sample column can be given `dtype`
+    up front; pandas then never materialises a float64 copy. If `rows` is
+    given, only those features are kept while the file is parsed.
+    """
+    blocks = read_block_index(path)
+    if blocks:
+        df = _read_blocked(path, blocks, dtype, rows)
+    else:
+        df = _read_stream(path, dtype, rows)
+
+    df.index = pd.CategoricalIndex(df.index, name=index_name)
+    df.columns = pd.CategoricalIndex(df.columns, name="sample")
+    return df
+
+
+def load_expression(cohort, genes=None):
+    """Load the HiSeqV2 expression matrix as genes x samples (float32)."""
+    path = resolve_path(expression_path(cohort), "Expression")
+    return _read_matrix(path, np.float32, rows=genes)
+
+
+def load_cnv(cohort, genes=None):
+    """
+    Load GISTIC2 thresholded copy-number calls as genes x samples.
+
+    Calls are integers in [-2, 2] and stored as int8; a file with missing
+    calls is read as float32 instead, since int8 cannot hold NaN.
+    """
+    path = resolve_path(cnv_path(cohort), "CNV")
+    try:
+        return _read_matrix(path, np.int8, rows=genes)
+    except ValueError:
+        return _read_matrix(path, np.float32, rows=genes)
+
+
+def load_methylation(cohort, probes=None):
+    """Load HumanMethylation450 beta values as probes x samples (float32)."""
+    path = resolve_path(methylation_path(cohort), "Methylation")
+    return _read_matrix(path, np.float32, rows=probes, index_name="probe")
+
+
+def load_probe_map():
+    """Load the probe -> gene map used to aggregate methylation probes."""
+    path = resolve_path(probe_map_path(), "Probe map")
+    with open_input(path) as f:
+        return pd.read_csv(f, sep="\t", header=None, names=["probe", "gene"], usecols=[0, 1],
+                           dtype={"probe": str, "gene": "category"})
+
+
+def load_clinical(cohort):
+    """Load the Xena clinicalMatrix for a cohort, indexed by sample barcode."""
+    path = resolve_path(clinical_path(cohort), "Clinical")
+    with open_input(path) as f:
+        return pd.read_csv(f, sep="\t", index_col=0)
+
+
+def load_survival():
+    """Load the TCGA-CDR survival table."""
+    path = resolve_path(survival_path(), "Survival")
+    with open_input(path) as f:
+        return pd.read_csv(f, sep="\t")
+
+
+def seed_random(seed=None):
+    """Seed Python's and NumPy's global RNGs (seaborn draws stripplot jitter from NumPy's)."""
+    seed = RANDOM_SEED if seed is None else seed
+    random.seed(seed)
+    np.random.seed(seed)
+    return seed
+
+
+def gene_vector(matrix, gene, name=None):
+    """
+    Return one feature of a gene-major matrix as a sample-indexed Series.
+
+    The sample index is converted to plain strings so the vector can be
+    joined against clinical and survival tables keyed by barcode.
+    """
+    vector = matrix.loc[gene]
+    vector.index = pd.Index(vector.index.astype(str), name="sample")
+    vector.name = name or gene
+    return vector
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+
+"""
+Script: tcga_fetch.py
+
+Description:
+    Stages every input the pipeline needs for one or more TCGA cohorts by
+    downloading them from a UCSC Xena hub (or a local Xena-style mirror)
+    into data/processed and data/metadata. Downloads run concurrently under
+    asyncio, interrupted transfers are resumed with HTTP range requests,
+    checksums are verified when the hub publishes a `<file>.md5` sidecar,
+    and `.gz` files are decompressed while they stream in.
+
+    Files are fetched to `<dest>.part`; an existing `.part` file is resumed
+    from its current size. Destinations that already exist (plain or
+    compressed) are skipped unless --force is given. With --keep-compressed
+    `.gz` files are stored as distributed; the loaders read them directly.
+
+Usage:
+    python3 tcga_fetch.py <COHORT> [<COHORT> ...] [OPTIONS]
+    Example: python3 tcga_fetch.py LUAD KIRC --workers 8
+    Example: python3 tcga_fetch.py LUAD --base-url http://localhost:8000 --datasets expression survival
+
+Inputs:
+    - <COHORT>: one or more TCGA cancer type abbreviations (e.g., LUAD, KIRC)
+    - --base-url: hub root; defaults to $TCGA_MIRROR_URL or the public Xena TCGA hub
+    - --pancan-url: root of the PanCanAtlas hub serving the TCGA-CDR survival table
+      ($TCGA_PANCAN_URL; defaults to the public hub, or to --base-url for a mirror)
+
+Outputs:
+    - data/processed/TCGA.<COHORT>.sampleMap_HiSeqV2
+    - data/processed/TCGA.<COHORT>.sampleMap_Gistic2_CopyNumber_Gistic2_all_thresholded.by_genes
+    - data/processed/TCGA.<COHORT>.sampleMap_HumanMethylation450
+    - data/processed/probeMap_hugo_gencode_good_hg19_V24lift37_probemap
+    - data/metadata/TCGA.<COHORT>.sampleMap_<COHORT>_clinicalMatrix
+    - data/metadata/survival_tcga_cdr.tsv
+
+This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
+
+Requirements:
+    - Python ≥ 3.8 (standard library only)
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import urllib.error
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from tcga_data import (
+    BLOCK_INDEX_SUFFIX, COMPRESSION_SUFFIXES, expression_path, cnv_path, methylation_path, probe_map_path, clinical_path, survival_path,
+)
+
+PUBLIC_TCGA_URL = "https://tcga.xenahubs.net/download"
+PUBLIC_PANCAN_URL = "https://pancanatlas.xenahubs.net/download"
+DEFAULT_BASE_URL = os.environ.get("TCGA_MIRROR_URL", PUBLIC_TCGA_URL)
+DEFAULT_PANCAN_URL = os.environ.get("TCGA_PANCAN_URL")
+BLOCK_SIZE = 1 << 20
+TIMEOUT = 60
+
+# Sidecar holding the ETag/Last-Modified of the response a `.part` file was started from
+VALIDATOR_SUFFIX = ".validator"
+
+# dataset name -> (hub, remote path relative to the hub root, local destination);
+# the TCGA-CDR survival table is published on the PanCanAtlas hub, not the TCGA hub
+COHORT_DATASETS = {
+    "expression": ("tcga", "TCGA.{cohort}.sampleMap/HiSeqV2.gz", expression_path),
+    "cnv": ("tcga", "TCGA.{cohort}.sampleMap/Gistic2_CopyNumber_Gistic2_all_thresholded.by_genes.gz", cnv_path),
+    "methylation": ("tcga", "TCGA.{cohort}.sampleMap/HumanMethylation450.gz", methylation_path),
+    "clinical": ("tcga", "TCGA.{cohort}.sampleMap/{cohort}_clinicalMatrix", clinical_path),
+}
+SHARED_DATASETS = {
+    "probemap": ("tcga", "probeMap/hugo_gencode_good_hg19_V24lift37_probemap", probe_map_path),
+    "survival": ("pancan", "Survival_SupplementalTable_S1_20171025_xena_sp", survival_path),
+}
+
+
+def hub_urls(base_url=DEFAULT_BASE_URL, pancan_url=DEFAULT_PANCAN_URL):
+    """
+    Root URL of each hub. A mirror given as the base URL is assumed to host
+    the PanCanAtlas files too, unless a separate PanCanAtlas root is given.
+    """
+    if pancan_url is None:
+        pancan_url = PUBLIC_PANCAN_URL if base_url.rstrip("/") == PUBLIC_TCGA_URL else base_url
+    return {"tcga": base_url, "pancan": pancan_url}
+
+
+def build_jobs(cohorts, datasets, hubs):
+    """Expand cohorts x datasets into (hub root URL, remote path, local destination) triples."""
+    jobs = []
+    for name in datasets:
+        if name in COHORT_DATASETS:
+            hub, remote, local = COHORT_DATASETS[name]
+            jobs.extend((hubs[hub], remote.format(cohort=c), local(c)) for c in cohorts)
+        else:
+            hub, remote, local = SHARED_DATASETS[name]
+            jobs.append((hubs[hub], remote, local()))
+    return jobs
+
+
+class _GunzipStream:
+    """Incremental gzip decoder that also handles multi-member files."""
+
+    def __init__(self):
+        self._decoder = zlib.decompressobj(wbits=31)
+
+    def feed(self, block):
+        out = [self._decoder.decompress(block)]
+        while self._decoder.eof and self._decoder.unused_data:
+            rest = self._decoder.unused_data
+            self._decoder = zlib.decompressobj(wbits=31)
+            out.append(self._decoder.decompress(rest))
+        return b"".join(out)
+
+    def close(self):
+        if not self._decoder.eof:
+            raise IOError("truncated gzip stream")
+        return self._decoder.flush()
+
+
+def _open(url, offset=0, validator=None):
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+        if validator:
+            request.add_header("If-Range", validator)  # full body instead if the file has changed
+    return urllib.request.urlopen(request, timeout=TIMEOUT)
+
+
+def _validator(headers):
+    """Strong ETag, or else Last-Modified, of a response (what If-Range accepts)."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _total_size(headers, offset=0):
+    """Full size of the remote file from Content-Range or Content-Length, or None if not given."""
+    content_range = headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get("Content-Length")
+    return offset + int(length) if length and length.isdigit() else None
+
+
+def fetch_checksum(url):
+    """Return the published md5 for `url` (from `<url>.md5`), or None if there is none."""
+    try:
+        with _open(url + ".md5") as response:
+            return response.read().decode().split()[0].lower()
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
+def download(base_url, remote, dest, force=False, require_checksum=False, keep_compressed=False):
+    """
+    Fetch one file, resuming from `<dest>.part` and verifying its md5.
+
+    The raw transfer is kept in `<dest>.part` until it has been verified, so
+    an interrupted run can pick up where it left off; a resumed `.part` is
+    replayed through the hash and gzip decoder before new bytes are read.
+    The ETag/Last-Modified of the first response is kept in
+    `<dest>.part.validator` and sent as If-Range on resume, so a file that
+    changed on the server is downloaded afresh rather than spliced; a
+    `.part` without a validator is restarted. A transfer shorter than the size the server announced, or a gzip stream
+    that does not end cleanly, raises and leaves the `.part` for resuming.
+    Returns a short status string.
+    """
+    if not force and any(os.path.exists(dest + suffix) for suffix in COMPRESSION_SUFFIXES):
+        return "already present"
+
+    base = dest
+    decompress = remote.endswith(".gz") and not keep_compressed
+    if remote.endswith(".gz") and keep_compressed:
+        dest += ".gz"
+
+    url = f"{base_url.rstrip('/')}/{remote}"
+    part, tmp = dest + ".part", dest + ".tmp"
+    validator_path = part + VALIDATOR_SUFFIX
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    expected = fetch_checksum(url)
+    if expected is None and require_checksum:
+        raise IOError(f"no checksum published for {url}")
+
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    validator = None
+    if offset and os.path.exists(validator_path):
+        with open(validator_path) as f:
+            validator = f.read().strip() or None
+    if validator is None:
+        offset = 0  # no way to tell whether the remote file changed; start over
+
+    try:
+        response = _open(url, offset, validator)
+    except urllib.error.HTTPError as e:
+        if e.code != 416:  # 416: the .part file already holds the whole body
+            raise
+        response = None
+        total = _total_size(e.headers)
+
+    if response is not None:
+        if offset and response.status != 206:
+            offset = 0  # file changed since the .part was started, or no range support; start over
+        total = _total_size(response.headers, offset)
+        if not offset:
+            validator = _validator(response.headers)
+            if validator:
+                with open(validator_path, "w") as f:
+                    f.write(validator)
+            elif os.path.exists(validator_path):
+                os.remove(validator_path)
+
+    # Plain files are verified and renamed from .part as-is; .gz files are
+    # decoded into .tmp as they stream (or, with keep_compressed, decoded
+    # only to check that the gzip stream is complete)
+    md5 = hashlib.md5()
+    gunzip = _GunzipStream() if remote.endswith(".gz") else None
+    with open(tmp if decompress else os.devnull, "wb") as out:
+        def consume(block):
+            md5.update(block)
+            if gunzip:
+                out.write(gunzip.feed(block))
+
+        if offset:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+                    consume(block)
+
+        if response is not None:
+            with response, open(part, "ab" if offset else "wb") as raw:
+                for block in iter(lambda: response.read(BLOCK_SIZE), b""):
+                    raw.write(block)
+                    consume(block)
+
+        # A connection closed early leaves a short .part; keep it so the next run resumes
+        received = os.path.getsize(part) if os.path.exists(part) else 0
+        if total is not None and received < total:
+            raise IOError(f"incomplete transfer for {url} ({received} of {total} bytes); rerun to resume")
+
+        if gunzip:
+            out.write(gunzip.close())
+
+    if expected is not None and md5.hexdigest() != expected:
+        os.remove(part)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        if decompress:
+            os.remove(tmp)
+        raise IOError(f"checksum mismatch for {url} (expected {expected}, got {md5.hexdigest()})")
+
+    # Other copies of the dataset (resolve_path prefers the plain one) and block
+    # indexes written for a previous copy would shadow or mismatch the new file
+    for suffix in COMPRESSION_SUFFIXES:
+        for stale in (base + suffix, base + suffix + BLOCK_INDEX_SUFFIX):
+            if stale != dest and os.path.exists(stale):
+                os.remove(stale)
+    if decompress:
+        os.replace(tmp, dest)
+        os.remove(part)
+    else:
+        os.replace(part, dest)
+    if os.path.exists(validator_path):
+        os.remove(validator_path)
+    status = "resumed" if offset else "downloaded"
+    return status + (", md5 verified" if expected else ", no checksum published")
+
+
+async def fetch_all(jobs, workers=8, force=False, require_checksum=False, keep_compressed=False):
+    """Run all (hub root URL, remote path, destination) downloads concurrently; returns [(dest, status or exception)]."""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        async def run(base_url, remote, dest):
+            try:
+                status = await loop.run_in_executor(
+                    pool, download, base_url, remote, dest, force, require_checksum, keep_compressed)
+            except Exception as e:
+                status = e
+            print(f"{'❌' if isinstance(status, Exception) else '✅'} {os.path.basename(dest)}: {status}")
+            return dest, status
+
+        return await asyncio.gather(*(run(*job) for job in jobs))
+
+
+def main():
+    all_datasets = list(COHORT_DATASETS) + list(SHARED_DATASETS)
+    parser = argparse.ArgumentParser(description="Stage TCGA inputs from a Xena hub or mirror.")
+    parser.add_argument('cohorts', nargs='+', help="TCGA cohort names (e.g., LUAD KIRC)")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help="TCGA hub root URL (default: %(default)s)")
+    parser.add_argument('--pancan-url', default=DEFAULT_PANCAN_URL,
+                        help="PanCanAtlas hub root for the survival table ($TCGA_PANCAN_URL; default: "
+                             f"{PUBLIC_PANCAN_URL}, or --base-url when that is a mirror)")
+    parser.add_argument('--datasets', nargs='+', choices=all_datasets, default=all_datasets,
+                        help="Subset of datasets to fetch (default: all)")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent downloads (default: 8)")
+    parser.add_argument('--force', action='store_true', help="Re-download files that already exist")
+    parser.add_argument('--require-checksum', action='store_true',
+                        help="Fail files whose hub publishes no .md5 sidecar")
+    parser.add_argument('--keep-compressed', action='store_true',
+                        help="Store .gz files as distributed instead of decompressing them")
+    args = parser.parse_args()
+
+    cohorts = [c.upper() for c in args.cohorts]
+    hubs = hub_urls(args.base_url, args.pancan_url)
+    jobs = build_jobs(cohorts, args.datasets, hubs)
+    print(f"🔍 Staging {len(jobs)} files for {', '.join(cohorts)} from {', '.join(sorted(set(hubs.values())))}")
+
+    results = asyncio.run(fetch_all(jobs, args.workers, args.force, args.require_checksum, args.keep_compressed))
+    failed = [dest for dest, status in results if isinstance(status, Exception)]
+    if failed:
+        print(f"❌ {len(failed)} of {len(jobs)} files failed; rerun to resume.")
+        sys.exit(1)
+    print(f"✅ All {len(jobs)} files staged.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+"""
+Script: tcga_results.py
+
+Description:
+    Append-only results database shared by all stages. Each stage appends
+    its per-gene, per-cohort statistics (log-rank p-values, co-expression r,
+    enrichment scores, multi-omics correlations, ...) to one SQLite file, so
+    summary tables can be built with a query instead of re-parsing per-run
+    CSVs.
+
+    Rows are never updated or deleted. Every row carries the run that wrote
+    it; queries return the most recent run of each (cohort, stage, gene,
+    statistic) unless the full history is requested.
+
+    Table `stats`:
+        run_id, recorded_at, cohort, stage, gene, feature, statistic, value
+    `gene` is the gene of interest of the run (for per-gene summaries, the
+    gene itself); `feature` is what the statistic refers to within the run
+    (a co-expressed gene, a KEGG term, ...), or '' when not applicable.
+
+Usage:
+    python3 tcga_results.py query --gene PRRG2 --stage survival
+    python3 tcga_results.py cohorts --gene PRRG2 --where "survival.logrank_q<0.05" --where "multiomics.expr_cnv_r>0.4"
+    python3 tcga_results.py adjust --stage survival --statistic logrank_p
+    python3 tcga_results.py import            # backfill from existing results/ CSVs
+
+    from tcga_results import ResultsStore
+    ResultsStore().append("LUAD", "survival", "PRRG2", {"logrank_p": 0.013})
+
+Inputs:
+    - Database path: results/tcga_results.sqlite, or $TCGA_RESULTS_DB if set
+    - Run id: $TCGA_RUN_ID if set (e.g. shared by all stages of run_pipeline.sh), otherwise one per process
+
+This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
+
+Requirements:
+    - pandas, numpy
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import argparse
+import glob
+import operator
+import os
+import re
+import sqlite3
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from tcga_data import PROJECT_DIR
+
+RESULTS_DB = os.environ.get("TCGA_RESULTS_DB", os.path.join(PROJECT_DIR, "results", "tcga_results.sqlite"))
+RUN_ID = os.environ.get("TCGA_RUN_ID") or uuid.uuid4().hex[:12]
+
+COLUMNS = ["run_id", "recorded_at", "cohort", "stage", "gene", "feature", "statistic", "value"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats (
+    run_id      TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    cohort      TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    gene        TEXT NOT NULL,
+    feature     TEXT NOT NULL DEFAULT '',
+    statistic   TEXT NOT NULL,
+    value       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_stats_key ON stats (cohort, stage, gene, statistic, feature);
+CREATE INDEX IF NOT EXISTS idx_stats_gene ON stats (gene, stage, statistic);
+"""
+
+OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+             "==": operator.eq, "!=": operator.ne}
+CONDITION = re.compile(r"^(\w+)\.(\w+)(?:\[(.+)\])?\s*(<=|>=|==|!=|<|>)\s*(\S+)$")
+
+
+def benjamini_hochberg(p_values):
+    """Benjamini–Hochberg adjusted q-values, in the input order."""
+    p = np.asarray(p_values, dtype=float)
+    n = len(p)
+    if n == 0:
+        return p
+    order = np.argsort(p)
+    ranked = p[order] * n / np.arange(1, n + 1)
+    q = np.minimum.accumulate(ranked[::-1])[::-1]
+    out = np.empty(n)
+    out[order] = np.minimum(q, 1.0)
+    return out
+
+
+def parse_condition(text):
+    """Parse 'stage.statistic[feature] <op> value' into a condition tuple."""
+    match = CONDITION.match(text.strip())
+    if not match:
+        raise ValueError(f"❌ Cannot parse condition '{text}' (expected e.g. survival.logrank_q<0.05)")
+    stage, statistic, feature, op, value = match.groups()
+    return stage, statistic, feature or "", op, float(value)
+
+
+class ResultsStore:
+    """Append-only SQLite store of per-gene, per-cohort statistics."""
+
+    def __init__(self, path=RESULTS_DB, run_id=RUN_ID):
+        self.path = path
+        self.run_id = run_id
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as con:
+            con.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits (or rolls back) the block and is always closed."""
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _insert(self, rows):
+        recorded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._connect() as con:
+            con.executemany(
+                "INSERT INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((self.run_id, recorded_at, c, s, g, f, st, None if pd.isna(v) else float(v))
+                 for c, s, g, f, st, v in rows),
+            )
+        return len(rows)
+
+    def append(self, cohort, stage, gene, stats, feature=""):
+        """Append a {statistic: value} mapping for one cohort/stage/gene."""
+        rows = [(cohort, stage, gene, feature, statistic, value) for statistic, value in stats.items()]
+        return self._insert(rows)
+
+    def append_frame(self, cohort, stage, frame, gene=None):
+        """
+        Append every numeric column of `frame` as a statistic.
+
+        With `gene` given, the index holds the feature each row refers to
+        (e.g. co-expressed genes); otherwise the index holds the genes
+        themselves (per-gene summaries) and `feature` is left empty.
+        """
+        numeric = frame.select_dtypes(include="number")
+        labels = numeric.index.astype(str)
+        rows = [
+            (cohort, stage, gene if gene is not None else label, label if gene is not None else "", statistic, value)
+            for statistic in numeric.columns
+            for label, value in zip(labels, numeric[statistic].to_numpy())
+        ]
+        return self._insert(rows)
+
+    def query(self, cohort=None, stage=None, gene=None, feature=None, statistic=None, history=False):
+        """Return matching rows as a DataFrame (latest run of each cohort/stage/gene/feature/statistic unless `history`)."""
+        filters = {"cohort": cohort, "stage": stage, "gene": gene, "feature": feature, "statistic": statistic}
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"s.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if not history:
+            clauses.append(
+                "s.run_id = (SELECT l.run_id FROM stats l WHERE l.cohort = s.cohort AND l.stage = s.stage"
+                " AND l.gene = s.gene AND l.statistic = s.statistic AND l.feature = s.feature"
+                " ORDER BY l.rowid DESC LIMIT 1)"
+            )
+        sql = f"SELECT {', '.join('s.' + c for c in COLUMNS)} FROM stats s"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._connect() as con:
+            return pd.read_sql_query(sql + " ORDER BY s.rowid", con, params=params)
+
+    def cohorts_where(self, gene, conditions):
+        """
+        Return the cohorts in which `gene` satisfies every condition.
+
+        `conditions` are (stage, statistic, feature, op, threshold) tuples,
+        e.g. ("survival", "logrank_q", "", "<", 0.05).
+        """
+        matching = None
+        for stage, statistic, feature, op, threshold in conditions:
+            rows = self.query(stage=stage, gene=gene, statistic=statistic, feature=feature)
+            hits = set(rows.loc[OPERATORS[op](rows["value"], threshold), "cohort"])
+            matching = hits if matching is None else matching & hits
+        return sorted(matching or [])
+
+    def adjust(self, stage, statistic, by="gene"):
+        """
+        Append Benjamini–Hochberg q-values for a p-value statistic.
+
+        `by="gene"` adjusts each gene/feature across cohorts (pan-cancer
+        sweeps); `by="cohort"` adjusts across features within each
+        cohort/gene run (e.g. all co-expression partners). The q-values are
+        stored under the statistic name with its `_p` suffix replaced by `_q`.
+        """
+        rows = self.query(stage=stage, statistic=statistic).dropna(subset=["value"])
+        keys = ["gene", "feature"] if by == "gene" else ["cohort", "gene"]
+        q_name = (statistic[:-2] if statistic.endswith("_p") else statistic) + "_q"
+        rows["q"] = rows.groupby(keys)["value"].transform(benjamini_hochberg)
+        return self._insert(list(zip(rows["cohort"], rows["stage"], rows["gene"], rows["feature"],
+                                     [q_name] * len(rows), rows["q"])))
+
+
+def import_existing(store, tables_dir, figures_dir):
+    """Backfill the store from per-run CSV/TSV outputs already on disk."""
+    imported = 0
+    for path in glob.glob(os.path.join(tables_dir, "*_expression_summary.tsv")):
+        cohort = os.path.basename(path).split("_")[0]
+        imported += store.append_frame(cohort, "descriptive_summary", pd.read_csv(path, sep="\t", index_col=0))
+    for path in glob.glob(os.path.join(tables_dir, "*_coexpression_full.csv")):
+        cohort, gene = os.path.basename(path)[:-len("_coexpression_full.csv")].split("_", 1)
+        imported += store.append_frame(cohort, "coexpression", pd.read_csv(path, index_col=0), gene=gene)
+    for path in glob.glob(os.path.join(tables_dir, "*_enrichment.csv")):
+        cohort, gene = os.path.basename(path)[:-len("_enrichment.csv")].split("_", 1)
+        gene = gene.rsplit("_", 1)[0]  # drop the gene-set label
+        imported += store.append_frame(cohort, "enrichment", enrichment_stats(pd.read_csv(path)), gene=gene)
+    for path in glob.glob(os.path.join(figures_dir, "*_correlation_stats.csv")):
+        cohort, gene = os.path.basename(path)[:-len("_correlation_stats.csv")].split("_", 1)
+        corr = pd.read_csv(path).set_index("Comparison")
+        imported += store.append(cohort, "multiomics", gene, multiomics_stats(corr))
+    return imported
+
+
+def enrichment_table_name(cohort, gene, gene_sets):
+    """
+    File name of a stage 04 table: <COHORT>_<GENE>_<gene-set label>_enrichment.csv.
+
+    The label is the Enrichr library or GMT file name, lower-cased and without
+    underscores (e.g. KEGG_2021_Human -> kegg-2021-human), so that
+    import_existing() can split it off genes that contain underscores.
+    """
+    name = os.path.basename(gene_sets)
+    if name.lower().endswith(".gmt"):
+        name = name[:-len(".gmt")]
+    label = re.sub(r"[^0-9a-z]+", "-", name.lower()).strip("-")
+    return f"{cohort}_{gene}_{label}_enrichment.csv"
+
+
+def enrichment_stats(res):
+    """Numeric Enrichr columns keyed by term, with snake_case statistic names."""
+    return res.set_index("Term")[["P-value", "Adjusted P-value", "Odds Ratio", "Combined Score"]].rename(
+        columns={"P-value": "p_value", "Adjusted P-value": "adjusted_p",
+                 "Odds Ratio": "odds_ratio", "Combined Score": "combined_score"})
+
+
+def multiomics_stats(corr):
+    """Flatten the 06 correlation table (indexed by Comparison) into named statistics."""
+    return {
+        "expr_cnv_r": corr.loc["Expression vs CNV", "Pearson_r"],
+        "expr_cnv_p": corr.loc["Expression vs CNV", "p_value"],
+        "expr_meth_r": corr.loc["Expression vs Methylation", "Pearson_r"],
+        "expr_meth_p": corr.loc["Expression vs Methylation", "p_value"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the TCGA toolkit results database.")
+    parser.add_argument('--db', default=RESULTS_DB, help="Database path (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    q = sub.add_parser("query", help="Print stored statistics")
+    for name in ("cohort", "stage", "gene", "feature", "statistic"):
+        q.add_argument(f"--{name}", nargs="+")
+    q.add_argument("--history", action="store_true", help="Include rows from superseded runs")
+    q.add_argument("--out", help="Write the result as TSV instead of printing it")
+
+    c = sub.add_parser("cohorts", help="List cohorts where a gene meets all conditions")
+    c.add_argument("--gene", required=True)
+    c.add_argument("--where", action="append", required=True, metavar="STAGE.STATISTIC[FEATURE]<OP>VALUE")
+
+    a = sub.add_parser("adjust", help="Append Benjamini–Hochberg q-values for a p-value statistic")
+    a.add_argument("--stage", required=True)
+    a.add_argument("--statistic", required=True)
+    a.add_argument("--by", choices=["gene", "cohort"], default="gene",
+                   help="Adjust across cohorts per gene (default) or across features per cohort")
+
+    sub.add_parser("import", help="Backfill from existing results/tables and results/figures outputs")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.command == "query":
+        rows = store.query(args.cohort, args.stage, args.gene, args.feature, args.statistic, args.history)
+        if args.out:
+            rows.to_csv(args.out, sep="\t", index=False)
+            print(f"✅ {len(rows)} rows saved to:\n{args.out}")
+        else:
+            print(rows.to_string(index=False))
+    elif args.command == "cohorts":
+        try:
+            conditions = [parse_condition(text) for text in args.where]
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        print("\n".join(store.cohorts_where(args.gene, conditions)))
+    elif args.command == "adjust":
+        n = store.adjust(args.stage, args.statistic, args.by)
+        print(f"✅ Appended {n} q-values for {args.stage}.{args.statistic}")
+    else:
+        n = import_existing(store, os.path.join(PROJECT_DIR, "results", "tables"),
+                            os.path.join(PROJECT_DIR, "results", "figures"))
+        print(f"✅ Imported {n} statistics into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+
+"""
+Script: tcga_server.py
+
+Description:
+    Long-running local query server for exploratory work. Cohort expression
+    matrices are loaded once into an LRU cache bounded by a memory budget,
+    so repeated gene-vector, co-expression, survival-split and
+    tumor-vs-normal queries are answered from memory instead of re-running
+    the stage scripts (and re-paying their load and import cost).
+
+    Co-expression queries use a per-cohort matrix of centered, unit-norm
+    gene rows built on first use, so each query is a single matrix-vector
+    product. Cache hits/misses and per-endpoint latencies are exposed at
+    /metrics.
+
+Endpoints (HTTP GET, JSON responses):
+    /gene?cohort=LUAD&gene=PRRG2                      expression vector by sample
+    /coexpression?cohort=LUAD&gene=PRRG2&top=50       top co-expressed genes (Pearson r, p)
+    /survival?cohort=LUAD&gene=PRRG2                  median split + log-rank test
+    /tumor_vs_normal?cohort=LUAD&gene=PRRG2           Welch t-test, tumor (01) vs normal (11)
+    /metrics                                          cache and latency metrics
+
+Usage:
+    python3 tcga_server.py [--port 8750] [--memory-gb 8] [--preload LUAD KIRC]
+    Example: curl 'http://127.0.0.1:8750/coexpression?cohort=LUAD&gene=PRRG2&top=20'
+
+This script includes ✅ and ❌ print outputs to provide visual feedback on successful execution or errors.
+
+Requirements:
+    - pandas, numpy, scipy, lifelines
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from lifelines.statistics import logrank_test
+from scipy.special import stdtr
+from scipy.stats import ttest_ind
+
+from tcga_data import gene_vector, load_expression, load_survival
+from tcga_stats import BLOCK_ROWS
+
+# Latency samples kept per endpoint for percentile metrics
+LATENCY_WINDOW = 1000
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+class CohortEntry:
+    """One cached cohort: the expression matrix plus lazily derived views."""
+
+    def __init__(self, cohort, expr):
+        self.cohort = cohort
+        self.expr = expr
+        self.samples = expr.columns.astype(str)
+        self._normalized = None
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        size = _frame_bytes(self.expr)
+        if self._normalized is not None:
+            size += self._normalized[0].nbytes
+        return size
+
+    @property
+    def has_normalized(self):
+        return self._normalized is not None
+
+    def normalized_nbytes(self):
+        """Size the normalized view adds once built (at most the float32 matrix)."""
+        return self.expr.shape[0] * self.expr.shape[1] * np.dtype(np.float32).itemsize
+
+    def normalized(self):
+        """Centered, unit-norm float32 gene rows over complete samples, and their sample mask."""
+        with self._lock:
+            if self._normalized is None:
+                values = self.expr.to_numpy()
+                complete = ~np.isnan(values).any(axis=0)  # as stage 03: drop samples with missing values
+                z = np.empty((values.shape[0], int(complete.sum())), dtype=np.float32)
+                # float64 only one block of rows at a time, so building adds little beyond the view
+                for start in range(0, len(z), BLOCK_ROWS):
+                    x = values[start:start + BLOCK_ROWS][:, complete].astype(np.float64)
+                    x -= x.mean(axis=1, keepdims=True)
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        x /= np.sqrt(np.einsum("ij,ij->i", x, x))[:, None]
+                    z[start:start + BLOCK_ROWS] = x
+                self._normalized = (z, complete)
+            return self._normalized
+
+
+class CohortCache:
+    """Thread-safe LRU cache of cohorts, evicting least recently used ones beyond a byte budget."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = defaultdict(threading.Lock)
+
+    def get(self, cohort):
+        with self._lock:
+            if cohort in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(cohort)
+                return self._entries[cohort]
+            load_lock = self._loading[cohort]
+
+        # Load outside the cache lock; concurrent requests for the same cohort wait here
+        with load_lock:
+            with self._lock:
+                if cohort in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(cohort)
+                    return self._entries[cohort]
+                self.misses += 1
+            entry = CohortEntry(cohort, load_expression(cohort))
+            with self._lock:
+                self._entries[cohort] = entry
+                self.trim(keep=cohort)
+            return entry
+
+    def normalized(self, entry):
+        """
+        Return a cohort's normalized view, evicting other cohorts to fit it.
+
+        The cohort becomes the most recently used one. Room is made before
+        the view is built, and the cache is trimmed again once the view is
+        counted in the entry's size.
+        """
+        with self._lock:
+            if entry.cohort in self._entries:
+                self._entries.move_to_end(entry.cohort)
+            if not entry.has_normalized:
+                self.trim(keep=entry.cohort, reserve=entry.normalized_nbytes())
+        view = entry.normalized()
+        with self._lock:
+            self.trim(keep=entry.cohort)
+        return view
+
+    def trim(self, keep=None, reserve=0):
+        """
+        Evict least recently used cohorts until the cache, plus `reserve`
+        bytes about to be allocated, fits its budget (call with the lock held).
+        `keep` (by default the most recently used cohort) is never evicted.
+        """
+        if keep is None:
+            keep = next(reversed(self._entries), None)
+        for cohort in [c for c in self._entries if c != keep]:
+            if self.used_bytes() + reserve <= self.budget_bytes:
+                break
+            del self._entries[cohort]
+            self.evictions += 1
+
+    def used_bytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "cohorts": {c: e.nbytes for c, e in self._entries.items()},
+                "used_bytes": self.used_bytes(),
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class QueryService:
+    """Query implementations on top of the cohort cache."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._survival = None
+        self._survival_lock = threading.Lock()
+
+    def survival_table(self):
+        """TCGA-CDR survival table formatted as in 02_survival_analysis.py (loaded once)."""
+        with self._survival_lock:
+            if self._survival is None:
+                surv = load_survival().rename(columns={"sample": "Sample", "OS": "OS_event", "OS.time": "OS_time"})
+                surv = surv[["Sample", "OS_time", "OS_event"]].dropna()
+                surv["Sample"] = surv["Sample"].str.replace(r"-01$", "", regex=True)
+                self._survival = surv.set_index("Sample")
+            return self._survival
+
+    def _vector(self, cohort, gene):
+        entry = self.cache.get(cohort)
+        if gene not in entry.expr.index:
+            raise KeyError(f"Gene '{gene}' not found in {cohort} expression matrix.")
+        return entry, gene_vector(entry.expr, gene)
+
+    def gene(self, cohort, gene):
+        _, vector = self._vector(cohort, gene)
+        return {"cohort": cohort, "gene": gene, "values": vector.astype(float).to_dict()}
+
+    def coexpression(self, cohort, gene, top=50):
+        if top < 1:
+            raise ValueError(f"top must be at least 1 (got {top}).")
+        entry, _ = self._vector(cohort, gene)
+        z, complete = self.cache.normalized(entry)
+        target_row = entry.expr.index.get_loc(gene)
+        r = np.clip((z @ z[target_row]).astype(np.float64), -1.0, 1.0)
+        r[target_row] = np.nan  # exclude self-correlation
+        dof = int(complete.sum()) - 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            p = 2 * stdtr(dof, -np.abs(r * np.sqrt(dof / (1.0 - r * r))))
+        order = np.argsort(-np.nan_to_num(r, nan=-np.inf))[:top]
+        genes = entry.expr.index.astype(str)
+        return {
+            "cohort": cohort, "gene": gene, "n_samples": int(complete.sum()),
+            "results": [{"gene": genes[i], "correlation": r[i], "p_value": p[i]} for i in order],
+        }
+
+    def survival(self, cohort, gene):
+        _, vector = self._vector(cohort, gene)
+        vector.index = vector.index.str.replace(r"-01A.*$", "", regex=True)
+        merged = vector.to_frame("value").join(self.survival_table()).dropna()
+        high = merged["value"] > merged["value"].median()
+        test = logrank_test(merged.loc[high, "OS_time"], merged.loc[~high, "OS_time"],
+                            event_observed_A=merged.loc[high, "OS_event"],
+                            event_observed_B=merged.loc[~high, "OS_event"])
+        return {
+            "cohort": cohort, "gene": gene, "median": merged["value"].median(),
+            "n_high": int(high.sum()), "n_low": int((~high).sum()),
+            "logrank_statistic": test.test_statistic, "logrank_p": test.p_value,
+        }
+
+    def tumor_vs_normal(self, cohort, gene):
+        entry, vector = self._vector(cohort, gene)
+        codes = np.array([s.split("-")[3][:2] if s.count("-") >= 3 else "" for s in entry.samples])
+        tumor = vector.to_numpy()[codes == "01"].astype(float)
+        normal = vector.to_numpy()[codes == "11"].astype(float)
+        t_stat, p_val = ttest_ind(tumor, normal, equal_var=False)
+        return {
+            "cohort": cohort, "gene": gene, "n_tumor": len(tumor), "n_normal": len(normal),
+            "mean_tumor": np.mean(tumor) if len(tumor) else None,
+            "mean_normal": np.mean(normal) if len(normal) else None,
+            "welch_t": t_stat, "welch_p": p_val,
+        }
+
+
+def _clean(value):
+    """Make query results JSON-safe (numpy scalars to Python, NaN/inf to null)."""
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    return value
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, QueryHandler)
+        self.service = service
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.metrics_lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self.metrics_lock:
+            self.requests[endpoint] += 1
+            self.latencies[endpoint].append(seconds * 1000.0)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def metrics(self):
+        with self.metrics_lock:
+            latency = {
+                endpoint: {
+                    "requests": self.requests[endpoint],
+                    "errors": self.errors[endpoint],
+                    "mean_ms": float(np.mean(samples)),
+                    "p50_ms": float(np.percentile(samples, 50)),
+                    "p95_ms": float(np.percentile(samples, 95)),
+                    "max_ms": float(np.max(samples)),
+                }
+                for endpoint, samples in self.latencies.items()
+            }
+        return {"cache": self.service.cache.snapshot(), "latency": latency}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # endpoint -> (QueryService method name, required params, optional int params)
+    ROUTES = {
+        "/gene": ("gene", ("cohort", "gene"), ()),
+        "/coexpression": ("coexpression", ("cohort", "gene"), ("top",)),
+        "/survival": ("survival", ("cohort", "gene"), ()),
+        "/tumor_vs_normal": ("tumor_vs_normal", ("cohort", "gene"), ()),
+    }
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            self._send(200, self.server.metrics())
+            return
+        if url.path not in self.ROUTES:
+            self._send(404, {"error": f"Unknown endpoint {url.path}"})
+            return
+
+        start = time.perf_counter()
+        method, required, optional = self.ROUTES[url.path]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            missing = [name for name in required if name not in params]
+            if missing:
+                raise ValueError(f"Missing parameter(s): {', '.join(missing)}")
+            kwargs = {name: params[name] for name in required}
+            kwargs["cohort"] = kwargs["cohort"].upper()
+            kwargs.update({name: int(params[name]) for name in optional if name in params})
+            status, body = 200, getattr(self.server.service, method)(**kwargs)
+        except (KeyError, FileNotFoundError) as e:
+            status, body = 404, {"error": str(e).strip("'\"")}
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        except Exception as e:  # keep serving; report the failure to the client
+            status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+        self.server.record(url.path, time.perf_counter() - start, status == 200)
+        self._send(status, body)
+
+    def _send(self, status, body):
+        payload = json.dumps(_clean(body)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # latency and errors are reported via /metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve TCGA cohort queries from an in-memory cache.")
+    parser.add_argument('--host', default="127.0.0.1", help="Bind address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8750, help="Port (default: %(default)s)")
+    parser.add_argument('--memory-gb', type=float, default=8.0, help="Cache memory budget in GB (default: 8)")
+    parser.add_argument('--preload', nargs='*', default=[], help="Cohorts to load at start-up")
+    args = parser.parse_args()
+
+    cache = CohortCache(int(args.memory_gb * 1024 ** 3))
+    for cohort in args.preload:
+        cache.get(cohort.upper())
+        print(f"✅ Preloaded {cohort.upper()}")
+
+    server = QueryServer((args.host, args.port), QueryService(cache))
+    print(f"✅ Serving TCGA queries on http://{args.host}:{args.port} (budget {args.memory_gb:g} GB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Module: tcga_shm.py
+
+Description:
+    Shared-memory backing for loaded cohort matrices. The parent process
+    copies a genes x samples matrix once into a `multiprocessing.shared_memory`
+    block and hands workers a small, picklable `SharedMatrix` handle; each
+    worker attaches to the same physical pages and gets a read-only
+    DataFrame view without copying or unpickling the matrix.
+
+    `worker_pool()` starts a process pool whose workers attach once at
+    start-up; task functions then call `worker_matrix()` to get the view.
+
+Usage:
+    from tcga_shm import SharedMatrix, worker_pool, worker_matrix
+
+    with SharedMatrix.create(expr) as handle, worker_pool(handle, 8) as pool:
+        results = pool.map(task, chunks)       # task() calls worker_matrix()
+
+Requirements:
+    - pandas, numpy
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# Handle and matrix attached by the worker_pool() initializer in each worker
+# process; the handle is kept so the block stays mapped for the worker's lifetime
+_worker_handle = None
+_worker_matrix = None
+
+
+def _attach_block(name):
+    """Attach to an existing block without registering it for cleanup (owner unlinks it)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python ≥ 3.13
+    except TypeError:
+        # Older Pythons: pool workers share the owner's resource tracker, so
+        # attaching registers nothing the owner's unlink() doesn't undo
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedMatrix:
+    """Picklable handle to a feature x sample matrix held in shared memory."""
+
+    def __init__(self, name, shape, dtype, index, columns, index_name=None, owner=False):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+        self.index = list(index)
+        self.columns = list(columns)
+        self.index_name = index_name
+        self._owner = owner
+        self._shm = None
+
+    @classmethod
+    def create(cls, frame):
+        """Copy `frame`'s values into a new shared block and return the owning handle."""
+        values = np.ascontiguousarray(frame.to_numpy())
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[...] = values
+        handle = cls(shm.name, values.shape, values.dtype, frame.index.astype(str), frame.columns.astype(str),
+                     frame.index.name, owner=True)
+        handle._shm = shm
+        return handle
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_owner"], state["_shm"] = False, None
+        return state
+
+    def values(self):
+        """Return a read-only ndarray view of the shared block."""
+        if self._shm is None:
+            self._shm = _attach_block(self.name)
+        array = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=self._shm.buf)
+        array.flags.writeable = False
+        return array
+
+    def attach(self):
+        """Return a zero-copy DataFrame view with categorical indexes, as tcga_data loads them."""
+        return pd.DataFrame(
+            self.values(),
+            index=pd.CategoricalIndex(self.index, name=self.index_name),
+            columns=pd.CategoricalIndex(self.columns, name="sample"),
+            copy=False,
+        )
+
+    def close(self):
+        """Detach; the owning handle also frees the block."""
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _init_worker(handle):
+    global _worker_handle, _worker_matrix
+    _worker_handle = handle
+    _worker_matrix = handle.attach()
+
+
+def worker_matrix():
+    """The shared matrix attached in this worker (see worker_pool)."""
+    return _worker_matrix
+
+
+def worker_pool(handle, processes):
+    """Start a multiprocessing.Pool whose workers attach to `handle` once at start-up."""
+    return multiprocessing.Pool(processes, initializer=_init_worker, initargs=(handle,))
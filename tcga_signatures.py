@@ -0,0 +1,207 @@
+"""
+Module: tcga_signatures.py
+
+Description:
+    Gene-signature scoring engine. Scores every sample of a cohort for every
+    signature in a GMT file with one of two methods:
+
+    — zscore: mean of per-gene z-scores (computed across the cohort) over
+      the signature genes present in the matrix
+    — ssgsea: single-sample GSEA (Barbie et al. 2009), using rank weights
+      |r|^0.25 and range-normalised scores as in GSVA's ssgsea method
+
+    Both work on the whole genes x samples matrix at once. ssGSEA ranks a
+    batch of samples with one argsort and scores all signatures against that
+    batch; with workers > 1, sample batches are spread over a process pool
+    that reads the matrix from shared memory (tcga_shm).
+
+    Scores are cached as results/tables/<COHORT>_<GMT>_<method>_scores.tsv
+    (samples x signatures) and reused while newer than both the GMT and the
+    expression file, so the co-expression and survival stages can use them
+    as targets or covariates.
+
+Usage:
+    from tcga_signatures import read_gmt, signature_scores
+    scores = signature_scores("LUAD", "ssgsea", workers=8)   # samples x signatures
+
+Requirements:
+    - pandas, numpy
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from tcga_data import PROJECT_DIR, expression_path, load_expression, resolve_path
+from tcga_shm import SharedMatrix, worker_pool, worker_matrix
+
+DEFAULT_GMT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures", "immune_signatures.gmt")
+METHODS = ("zscore", "ssgsea")
+
+# ssGSEA rank-weight exponent (Barbie et al. 2009) and samples ranked per batch
+SSGSEA_ALPHA = 0.25
+SSGSEA_BATCH = 64
+
+
+def read_gmt(path):
+    """Read a GMT file into {signature name: [genes]} (description column ignored)."""
+    signatures = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 3:
+                signatures[fields[0]] = [g for g in fields[2:] if g]
+    return signatures
+
+
+def _member_rows(genes, signatures):
+    """Map each signature to the row positions of its genes present in `genes`, dropping empty ones."""
+    position = {gene: i for i, gene in enumerate(genes)}
+    rows = {}
+    for name, members in signatures.items():
+        idx = sorted({position[g] for g in members if g in position})
+        if idx:
+            rows[name] = np.array(idx)
+        else:
+            print(f"⚠️ Signature '{name}' has no genes in the expression matrix; skipped.")
+    return rows
+
+
+def zscore_scores(matrix, signatures):
+    """Mean z-score per sample and signature (samples x signatures)."""
+    values = matrix.to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (values - np.nanmean(values, axis=1, keepdims=True)) / np.nanstd(values, axis=1, ddof=1, keepdims=True)
+    valid = np.isfinite(z)
+    z = np.where(valid, z, 0.0)
+
+    rows = _member_rows(matrix.index.astype(str), signatures)
+    membership = np.zeros((len(matrix), len(rows)))
+    for j, idx in enumerate(rows.values()):
+        membership[idx, j] = 1.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = (z.T @ membership) / (valid.T @ membership)
+    return pd.DataFrame(scores, index=matrix.columns.astype(str), columns=list(rows))
+
+
+def ssgsea_batch(values, member_rows, alpha=SSGSEA_ALPHA):
+    """
+    Unnormalised ssGSEA enrichment scores for a genes x samples block.
+
+    Genes are ranked within each sample (highest expression first); each
+    signature's score is the sum over ranks of the difference between the
+    weighted hit and the miss running sums. Returns samples x signatures.
+    """
+    n_genes = values.shape[0]
+    order = np.argsort(-values, axis=0, kind="stable")
+    weights = np.arange(n_genes, 0, -1, dtype=np.float64) ** alpha   # rank N for the top gene
+    scores = np.empty((values.shape[1], len(member_rows)))
+    member = np.zeros(n_genes, dtype=bool)
+    for j, idx in enumerate(member_rows):
+        member[:] = False
+        member[idx] = True
+        hits = member[order]                                       # genes x samples, in rank order
+        hit_weights = np.where(hits, weights[:, None], 0.0)
+        p_hit = np.cumsum(hit_weights, axis=0) / hit_weights.sum(axis=0)
+        p_miss = np.cumsum(~hits, axis=0) / (n_genes - len(idx))
+        scores[:, j] = (p_hit - p_miss).sum(axis=0)
+    return scores
+
+
+def ssgsea_batch_reference(values, member_rows, alpha=SSGSEA_ALPHA):
+    """Reference implementation of ssgsea_batch: one sample and one signature at a time."""
+    n_genes, n_samples = values.shape
+    scores = np.empty((n_samples, len(member_rows)))
+    for s in range(n_samples):
+        ranked = sorted(range(n_genes), key=lambda g: -values[g, s])
+        for j, idx in enumerate(member_rows):
+            members = set(int(i) for i in idx)
+            total = sum((n_genes - pos) ** alpha for pos, g in enumerate(ranked) if g in members)
+            hit = miss = es = 0.0
+            for pos, g in enumerate(ranked):
+                if g in members:
+                    hit += (n_genes - pos) ** alpha / total
+                else:
+                    miss += 1.0 / (n_genes - len(members))
+                es += hit - miss
+            scores[s, j] = es
+    return scores
+
+
+def _ssgsea_task(task):
+    """Worker task: ssGSEA scores for samples [start, stop) of the shared matrix."""
+    start, stop, member_rows = task
+    return ssgsea_batch(worker_matrix().to_numpy()[:, start:stop], member_rows)
+
+
+def ssgsea_scores(matrix, signatures, workers=1, batch=SSGSEA_BATCH, normalize=True):
+    """
+    ssGSEA score per sample and signature (samples x signatures).
+
+    Genes with any missing value are dropped first. With `normalize`, scores
+    are divided by the range of all scores, as GSVA does by default.
+    """
+    matrix = matrix.dropna(axis=0, how="any")
+    rows = _member_rows(matrix.index.astype(str), signatures)
+    member_rows = list(rows.values())
+    n_samples = matrix.shape[1]
+    spans = [(start, min(start + batch, n_samples)) for start in range(0, n_samples, batch)]
+
+    if workers <= 1:
+        values = matrix.to_numpy()
+        blocks = [ssgsea_batch(values[:, start:stop], member_rows) for start, stop in spans]
+    else:
+        with SharedMatrix.create(matrix) as handle, worker_pool(handle, workers) as pool:
+            blocks = pool.map(_ssgsea_task, [(start, stop, member_rows) for start, stop in spans])
+
+    scores = np.vstack(blocks) if blocks else np.empty((0, len(rows)))
+    if normalize and scores.size:
+        scores = scores / (scores.max() - scores.min())
+    return pd.DataFrame(scores, index=matrix.columns.astype(str), columns=list(rows))
+
+
+def score_matrix(matrix, signatures, method="zscore", workers=1):
+    """Score a genes x samples matrix with the given method."""
+    if method == "zscore":
+        return zscore_scores(matrix, signatures)
+    if method == "ssgsea":
+        return ssgsea_scores(matrix, signatures, workers=workers)
+    raise ValueError(f"❌ Unknown scoring method '{method}' (expected one of {', '.join(METHODS)})")
+
+
+def scores_path(cohort, method, gmt=DEFAULT_GMT):
+    gmt_name = os.path.splitext(os.path.basename(gmt))[0]
+    return os.path.join(PROJECT_DIR, "results", "tables", f"{cohort}_{gmt_name}_{method}_scores.tsv")
+
+
+def scores_current(cohort, method, gmt=DEFAULT_GMT):
+    """True if cached scores exist and are newer than both the GMT and the expression file."""
+    path = scores_path(cohort, method, gmt)
+    inputs = [gmt, resolve_path(expression_path(cohort), "Expression")]
+    return os.path.exists(path) and os.path.getmtime(path) >= max(map(os.path.getmtime, inputs))
+
+
+def signature_scores(cohort, method="zscore", gmt=DEFAULT_GMT, workers=1, matrix=None, refresh=False):
+    """
+    Return cached sample x signature scores for a cohort, computing them if needed.
+
+    `matrix` may be passed to avoid reloading expression when scores have
+    to be computed.
+    """
+    path = scores_path(cohort, method, gmt)
+    if not refresh and scores_current(cohort, method, gmt):
+        return pd.read_csv(path, sep="\t", index_col=0)
+
+    if matrix is None:
+        matrix = load_expression(cohort)
+    scores = score_matrix(matrix, read_gmt(gmt), method, workers)
+    scores.index.name = "sample"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    scores.to_csv(path, sep="\t")
+    return scores
@@ -0,0 +1,156 @@
+"""
+Module: tcga_stats.py
+
+Description:
+    Statistics engines shared by the stage scripts. Co-expression is computed
+    as one vectorized Pearson correlation of every gene row against a target
+    vector (in float64 blocks, so float32 matrices lose no precision), with
+    the per-gene scipy.stats.pearsonr loop kept as the reference
+    implementation. `coexpression()` correlates against a gene or any
+    sample-level vector (e.g. a signature score), optionally as a partial
+    correlation given a covariate, and can fan gene blocks out to a process
+    pool whose workers read the matrix from shared memory (tcga_shm).
+
+    `describe_rows()` is the per-gene summary of stage 01, computed in the
+    matrix's own (float32) dtype, with a float64 NumPy reference.
+
+Usage:
+    from tcga_stats import coexpression
+    results = coexpression(expr, "PRRG2", workers=8)   # DataFrame: correlation, p_value
+
+Requirements:
+    - pandas, numpy, scipy
+    - Python ≥ 3.8
+
+Author:
+    Jeffrey B. Callan
+    MSc Bioinformatics Candidate, Brandeis University
+    GitHub: https://github.com/jca11an
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+from scipy.stats import pearsonr
+
+from tcga_shm import SharedMatrix, worker_pool, worker_matrix
+
+# Gene rows upcast to float64 at a time (~8 MB per block for 1,000 samples)
+BLOCK_ROWS = 1024
+
+
+def pearson_rows(values, target, covariate=None):
+    """
+    Pearson r and two-sided p-value of each row of `values` against `target`.
+
+    Rows are processed in float64 blocks; p-values use the same t
+    distribution with n - 2 degrees of freedom as scipy.stats.pearsonr.
+    With a `covariate` vector, rows and target are first residualised on it
+    (partial correlation, n - 3 degrees of freedom). Constant rows give NaN.
+    """
+    y = np.asarray(target, dtype=np.float64)
+    y = y - y.mean()
+    c = None
+    if covariate is not None:
+        c = np.asarray(covariate, dtype=np.float64)
+        c = c - c.mean()
+        c = c / np.sqrt(c @ c)
+        y = y - (y @ c) * c
+    y_norm = np.sqrt(y @ y)
+    n = y.shape[0]
+    dof = n - 2 - (c is not None)
+    r = np.empty(values.shape[0])
+    for start in range(0, values.shape[0], BLOCK_ROWS):
+        x = np.asarray(values[start:start + BLOCK_ROWS], dtype=np.float64)
+        x = x - x.mean(axis=1, keepdims=True)
+        if c is not None:
+            x = x - np.outer(x @ c, c)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r[start:start + BLOCK_ROWS] = (x @ y) / (np.sqrt(np.einsum("ij,ij->i", x, x)) * y_norm)
+    r = np.clip(r, -1.0, 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = r * np.sqrt(dof / (1.0 - r * r))
+    p = 2 * stdtr(dof, -np.abs(t))
+    return r, p
+
+
+def pearson_rows_reference(values, target):
+    """Reference implementation: scipy.stats.pearsonr applied row by row."""
+    target = np.asarray(target, dtype=np.float64)
+    stats = [pearsonr(np.asarray(row, dtype=np.float64), target) for row in values]
+    return np.array([s[0] for s in stats]), np.array([s[1] for s in stats])
+
+
+def describe_rows(matrix):
+    """
+    Per-row mean, std, min, max and non-missing count of a feature x sample matrix.
+
+    Rows are summarised BLOCK_ROWS at a time, so the float64 temporaries
+    pandas allocates for the reductions stay the size of one block.
+    """
+    blocks = []
+    for start in range(0, len(matrix), BLOCK_ROWS):
+        block = matrix.iloc[start:start + BLOCK_ROWS]
+        blocks.append(pd.DataFrame({
+            "mean": block.mean(axis=1, skipna=True),
+            "std": block.std(axis=1, skipna=True),
+            "min": block.min(axis=1, skipna=True),
+            "max": block.max(axis=1, skipna=True),
+            "n_nonmissing": block.count(axis=1)
+        }))
+    if not blocks:
+        return pd.DataFrame(columns=["mean", "std", "min", "max", "n_nonmissing"], index=matrix.index)
+    return pd.concat(blocks)
+
+
+def describe_rows_reference(matrix):
+    """Reference implementation of describe_rows: float64 NumPy reductions, row by row."""
+    rows = []
+    for row in matrix.to_numpy(dtype=np.float64):
+        row = row[~np.isnan(row)]
+        if len(row) == 0:
+            rows.append((np.nan, np.nan, np.nan, np.nan, 0))
+        else:
+            std = row.std(ddof=1) if len(row) > 1 else np.nan
+            rows.append((row.mean(), std, row.min(), row.max(), len(row)))
+    return pd.DataFrame(rows, index=matrix.index, columns=["mean", "std", "min", "max", "n_nonmissing"])
+
+
+def _coexpression_block(task):
+    """Worker task: correlate rows [start, stop) of the shared matrix with the target."""
+    start, stop, target, covariate = task
+    return pearson_rows(worker_matrix().to_numpy()[start:stop], target, covariate)
+
+
+def coexpression(matrix, target, workers=1, covariate=None):
+    """
+    Correlate every gene of a genes x samples matrix with a target.
+
+    `target` is either a gene in `matrix` or a sample-indexed Series (e.g.
+    a signature score); an optional sample-indexed `covariate` makes this a
+    partial correlation. Only samples with values for target and covariate
+    are used. Returns a DataFrame of `correlation` and `p_value` indexed
+    like `matrix`. With workers > 1 the matrix is placed in shared memory
+    once and gene blocks are correlated in a process pool.
+    """
+    samples = matrix.columns.astype(str)
+    if not isinstance(target, pd.Series):
+        target = pd.Series(matrix.loc[target].to_numpy(), index=samples)
+    keep = samples.isin(target.dropna().index)
+    if covariate is not None:
+        keep &= samples.isin(covariate.dropna().index)
+    if not keep.all():
+        matrix, samples = matrix.loc[:, keep], samples[keep]
+
+    y = target.loc[samples].to_numpy(dtype=np.float64)
+    c = covariate.loc[samples].to_numpy(dtype=np.float64) if covariate is not None else None
+    if workers <= 1:
+        r, p = pearson_rows(matrix.to_numpy(), y, c)
+    else:
+        step = -(-len(matrix) // workers)
+        tasks = [(start, min(start + step, len(matrix)), y, c) for start in range(0, len(matrix), step)]
+        with SharedMatrix.create(matrix) as handle, worker_pool(handle, workers) as pool:
+            blocks = pool.map(_coexpression_block, tasks)
+        r = np.concatenate([b[0] for b in blocks])
+        p = np.concatenate([b[1] for b in blocks])
+    return pd.DataFrame({"correlation": r, "p_value": p}, index=matrix.index)
@@ -0,0 +1,163 @@
+"""
+Tests for tcga_fetch.download() against a local stand-in for a Xena hub.
+
+The stand-in serves in-memory files with ETags, honours Range and If-Range,
+and can cut responses short to simulate a dropped connection.
+
+Run with: python3 -m pytest tests/   (or python3 -m unittest discover tests)
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tcga_fetch import download  # noqa: E402
+
+
+class StandInHub(ThreadingHTTPServer):
+    """Serves `files` ({path: bytes}); the next `cuts` responses stop after `cut_at` bytes."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.files = {}
+        self.cut_at = None
+        self.cuts = 0
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        hub = self.server
+        hub.requests.append((self.path, self.headers.get("Range"), self.headers.get("If-Range")))
+        data = hub.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        start = 0
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range") or "")
+        if match and self.headers.get("If-Range") in (None, etag):
+            start = int(match.group(1))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if hub.cuts and not self.path.endswith(".md5"):
+            hub.cuts -= 1
+            body = body[:hub.cut_at]
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.hub = StandInHub()
+        threading.Thread(target=self.hub.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "survival.tsv")
+        self.payload = b"".join(b"TCGA-%04d-01\t%d\t1\n" % (i, i * 7) for i in range(20000))
+
+    def tearDown(self):
+        self.hub.shutdown()
+        self.hub.server_close()
+        self.tmp.cleanup()
+
+    def test_plain_download(self):
+        self.hub.files["/survival"] = self.payload
+        self.assertIn("downloaded", download(self.hub.url, "survival", self.dest))
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertEqual(download(self.hub.url, "survival", self.dest), "already present")
+
+    def test_truncated_transfer_keeps_part_and_resumes(self):
+        self.hub.files["/survival"] = self.payload
+        self.hub.cut_at, self.hub.cuts = 100_000, 1
+        with self.assertRaisesRegex(IOError, "incomplete transfer"):
+            download(self.hub.url, "survival", self.dest)
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertEqual(os.path.getsize(self.dest + ".part"), 100_000)
+
+        self.assertIn("resumed", download(self.hub.url, "survival", self.dest))
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertEqual(self.hub.requests[-1][1], "bytes=100000-")
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+        self.assertFalse(os.path.exists(self.dest + ".part.validator"))
+
+    def test_changed_file_is_not_spliced(self):
+        self.hub.files["/survival"] = self.payload
+        self.hub.cut_at, self.hub.cuts = 100_000, 1
+        with self.assertRaises(IOError):
+            download(self.hub.url, "survival", self.dest)
+
+        changed = self.payload.replace(b"\t1\n", b"\t0\n")
+        self.hub.files["/survival"] = changed
+        self.assertIn("downloaded", download(self.hub.url, "survival", self.dest))
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), changed)
+
+    def test_gzip_truncated_and_resumed_with_checksum(self):
+        compressed = gzip.compress(self.payload)
+        self.hub.files["/expr.gz"] = compressed
+        self.hub.files["/expr.gz.md5"] = hashlib.md5(compressed).hexdigest().encode()
+        self.hub.cut_at, self.hub.cuts = len(compressed) // 2, 1
+        with self.assertRaisesRegex(IOError, "incomplete transfer"):
+            download(self.hub.url, "expr.gz", self.dest)
+
+        self.assertEqual(download(self.hub.url, "expr.gz", self.dest), "resumed, md5 verified")
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), self.payload)
+
+    def test_keep_compressed_rejects_truncated_gzip(self):
+        compressed = gzip.compress(self.payload)
+        self.hub.files["/expr.gz"] = compressed
+        self.hub.cut_at, self.hub.cuts = len(compressed) // 2, 1
+        with self.assertRaisesRegex(IOError, "incomplete transfer"):
+            download(self.hub.url, "expr.gz", self.dest, keep_compressed=True)
+        self.assertFalse(os.path.exists(self.dest + ".gz"))
+
+        download(self.hub.url, "expr.gz", self.dest, keep_compressed=True)
+        with open(self.dest + ".gz", "rb") as f:
+            self.assertEqual(f.read(), compressed)
+
+    def test_forced_download_removes_other_copies(self):
+        compressed = gzip.compress(self.payload)
+        self.hub.files["/expr.gz"] = compressed
+        for stale in (self.dest, self.dest + ".bz2", self.dest + ".gz.blocks"):
+            with open(stale, "wb") as f:
+                f.write(b"stale")
+        download(self.hub.url, "expr.gz", self.dest, force=True, keep_compressed=True)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["survival.tsv.gz"])
+
+    def test_missing_file(self):
+        with self.assertRaises(IOError):
+            download(self.hub.url, "nope", self.dest)
+
+
+if __name__ == "__main__":
+    unittest.main()